@@ -0,0 +1,273 @@
+"""
+Sweeps class tuning attributes (e.g. Berserker.chance_to_convert, Sniper.range)
+and measures each setting's 1v1 win rate against the other classes.
+
+Games for every sweep point run headless across a process pool. A point stops
+getting new games as soon as a sequential probability ratio test (SPRT) says its
+win rate is clearly above or below 50%, so clearly over/under-powered settings
+cost a handful of games and only the close ones use the full budget.
+
+Example:
+    python balance_sweep.py -p Berserker.chance_to_convert=0.3:0.7:5 -p Sniper.sneakiness=0.4,0.5,0.6
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from engine import class_by_name, make_team_class, play_duel, stop_pool, PLAYABLE_CLASSES
+
+# --- Settings ---
+RESULTS_DIR = "results"
+
+
+def parse_param(spec):
+    """
+    Parses 'Class.attribute=values' where values is either 'start:stop:count'
+    (evenly spaced) or a comma separated list. Returns (class, attribute, values).
+    """
+    try:
+        target, values_spec = spec.split('=', 1)
+        class_name, attr = target.split('.', 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected Class.attribute=values, got '{spec}'")
+
+    if ':' in values_spec:
+        start, stop, count = values_spec.split(':')
+        values = np.linspace(float(start), float(stop), int(count)).tolist()
+    else:
+        values = [float(v) for v in values_spec.split(',')]
+    return class_name, attr, values
+
+def build_points(param_specs):
+    """Expands the parsed --param options into one (class_name, params) point per combination."""
+    by_class = {}
+    for class_name, attr, values in param_specs:
+        by_class.setdefault(class_name, {})[attr] = values
+
+    points = []
+    for class_name, attrs in by_class.items():
+        names = list(attrs)
+        for combo in itertools.product(*(attrs[n] for n in names)):
+            points.append((class_name, dict(zip(names, combo))))
+    return points
+
+def run_matchup(class_name, params, opponent_name, grid_size, updates_per_frame, max_frames, seed):
+    """Worker: plays one 1v1 game. Returns 1 if the swept class won, else 0."""
+    return play_duel((class_name, params), (opponent_name, None), grid_size, updates_per_frame, max_frames, seed)
+
+
+class SequentialTest:
+    """
+    SPRT between 'win rate = 0.5 - margin' and 'win rate = 0.5 + margin'.
+    decision is None until one of the hypotheses is accepted.
+    """
+    def __init__(self, margin, alpha):
+        self.p0 = 0.5 - margin
+        self.p1 = 0.5 + margin
+        self.upper = math.log((1 - alpha) / alpha)
+        self.lower = math.log(alpha / (1 - alpha))
+        self.wins = 0
+        self.games = 0
+        self.decision = None
+
+    def add(self, won):
+        """Records one game. Returns True if this game settled the test."""
+        self.games += 1
+        self.wins += won
+        if self.decision is not None:
+            return False
+        losses = self.games - self.wins
+        llr = (self.wins * math.log(self.p1 / self.p0)
+               + losses * math.log((1 - self.p1) / (1 - self.p0)))
+        if llr >= self.upper:
+            self.decision = "too strong"
+        elif llr <= self.lower:
+            self.decision = "too weak"
+        return self.decision is not None
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else float('nan')
+
+
+def format_params(params):
+    return ", ".join(f"{k}={v:g}" for k, v in params.items())
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel class parameter sweep for balance tuning.")
+    parser.add_argument(
+        '-p', '--param',
+        type=parse_param,
+        action='append',
+        required=True,
+        help='Class.attribute=start:stop:count or Class.attribute=v1,v2,... (repeatable)'
+    )
+    parser.add_argument(
+        '-o', '--opponents',
+        type=str,
+        default=None,
+        help='Comma separated opponent classes. Default: every other playable class'
+    )
+    parser.add_argument(
+        '-s', '--grid_size',
+        type=int,
+        default=50,
+        help='Side length of the square grid for each game. Default: 50'
+    )
+    parser.add_argument(
+        '-u', '--updates_per_frame',
+        type=int,
+        default=1000,
+        help='Number of pixel "fights" per frame. Default: 1000'
+    )
+    parser.add_argument(
+        '-n', '--max_frames',
+        type=int,
+        default=2000,
+        help='Frames before a stand-still is decided by pixel count. Default: 2000'
+    )
+    parser.add_argument(
+        '-g', '--max_games',
+        type=int,
+        default=200,
+        help='Most games played for one sweep point. Default: 200'
+    )
+    parser.add_argument(
+        '-m', '--margin',
+        type=float,
+        default=0.1,
+        help='Win rate distance from 50%% that counts as unbalanced. Default: 0.1'
+    )
+    parser.add_argument(
+        '-a', '--alpha',
+        type=float,
+        default=0.05,
+        help='Error rate of the sequential test. Default: 0.05'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes. Default: all CPUs'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Base random seed. Default: 0'
+    )
+    parser.add_argument(
+        '--csv',
+        action='store_true',
+        help=f'Also save the balance table as a CSV in the "{RESULTS_DIR}" folder.'
+    )
+    args = parser.parse_args()
+
+    # Fail fast on typos and fractional values for whole-number attributes, before starting the pool
+    points = build_points(args.param)
+    opponent_names = args.opponents.split(',') if args.opponents else [cls.__name__ for cls in PLAYABLE_CLASSES]
+    try:
+        for class_name, params in points:
+            make_team_class(class_name, 0, params)
+        for name in opponent_names:
+            class_by_name(name)
+    except ValueError as e:
+        parser.error(str(e))
+
+    opponents_for = {}
+    for class_name, _ in points:
+        opponents_for[class_name] = [name for name in opponent_names if name != class_name]
+        if not opponents_for[class_name]:
+            parser.error(f"{class_name} has no opponents: --opponents must name a class other than the swept one")
+
+    print(f"Sweeping {len(points)} points with up to {args.max_games} games each on {args.workers} workers...")
+
+    tests = [SequentialTest(args.margin, args.alpha) for _ in points]
+    per_opponent = [dict() for _ in points] # point -> {opponent: [wins, games]}
+    submitted = [0] * len(points)
+    seed_counter = itertools.count(args.seed)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            pending = {}
+
+            def submit(point_index):
+                class_name, params = points[point_index]
+                opponents = opponents_for[class_name]
+                opponent = opponents[submitted[point_index] % len(opponents)]
+                future = pool.submit(
+                    run_matchup, class_name, params, opponent,
+                    args.grid_size, args.updates_per_frame, args.max_frames, next(seed_counter)
+                )
+                pending[future] = (point_index, opponent)
+                submitted[point_index] += 1
+
+            def open_points():
+                return [i for i in range(len(points))
+                        if tests[i].decision is None and submitted[i] < args.max_games]
+
+            try:
+                # Fill the pool round-robin so every point gets early samples
+                while len(pending) < args.workers * 2 and open_points():
+                    for i in open_points()[:args.workers * 2 - len(pending)]:
+                        submit(i)
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        point_index, opponent = pending.pop(future)
+                        won = future.result()
+                        record = per_opponent[point_index].setdefault(opponent, [0, 0])
+                        record[0] += won
+                        record[1] += 1
+                        if tests[point_index].add(won):
+                            class_name, params = points[point_index]
+                            print(f"  {class_name}({format_params(params)}): {tests[point_index].decision} after {tests[point_index].games} games")
+
+                    candidates = open_points()
+                    candidates.sort(key=lambda i: submitted[i]) # Least sampled points first
+                    for i in candidates[:args.workers * 2 - len(pending)]:
+                        submit(i)
+            except KeyboardInterrupt:
+                stop_pool(pool) # Leaving the block would wait for every game already sent to the pool
+                raise
+    except KeyboardInterrupt:
+        print("\nStopped early.")
+
+    # --- Balance table ---
+    opponent_columns = sorted({opp for table in per_opponent for opp in table})
+    header = ["Class", "Params"] + [f"vs {opp}" for opp in opponent_columns] + ["Win rate", "Games", "Verdict"]
+    rows = []
+    for (class_name, params), test, table in zip(points, tests, per_opponent):
+        cells = []
+        for opp in opponent_columns:
+            wins, games = table.get(opp, (0, 0))
+            cells.append(f"{wins / games * 100:.0f}%" if games else "-")
+        rows.append([class_name, format_params(params)] + cells + [
+            f"{test.win_rate * 100:.1f}%", str(test.games), test.decision or "balanced?"
+        ])
+
+    widths = [max(len(row[c]) for row in [header] + rows) for c in range(len(header))]
+    print()
+    for row in [header] + rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+    print(f"\nTotal games played: {sum(test.games for test in tests)}")
+
+    if args.csv:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        filename = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("balance_%Y-%m-%d_%H-%M-%S.csv"))
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Balance table saved to '{filename}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Stacked multi-game engine: K independent games live in one (K, H, W) array and
+advance together with batched NumPy operations.
+
+Every step performs one attack in every running game, following the same rules
+as run_simulation() and the Class subclasses (pick_defender, defend, attack).
+Instead of calling Python methods, each team's class is described by a row of
+rule tables (range, defend chance, health, cluster conversion, pick retries),
+so one step costs the same handful of array operations whether K is 1 or 1000.
+Finished games are pulled out once per frame and their slot is refilled with
+the next matchup, reusing all buffers.
+
+Example (round-robin of every 1v1 pairing, 200 games each, 50x50 grids):
+    python batch_engine.py -k 512 -s 50 -r 200
+"""
+
+import argparse
+import itertools
+import logging
+import time
+
+import numpy as np
+
+from classes import Class, Berserker, Healer, Sniper, Assassin
+from engine import make_team_class, PLAYABLE_CLASSES
+from topology import get_topology
+
+ASSASSIN_TRIES = 3 # Matches the retry count in Assassin.pick_defender
+
+
+def class_rules(instance):
+    """
+    Describes a Class instance as batched rule values. Raises ValueError for
+    subclasses whose mechanics have no batched equivalent yet.
+    """
+    if type(instance) not in (Class, Berserker, Healer, Sniper, Assassin):
+        raise ValueError(f"No batched rules for {instance.get_name()}")
+    return {
+        'range': instance.range,
+        'pick_tries': ASSASSIN_TRIES if isinstance(instance, Assassin) else 1,
+        'defend_chance': instance.sneakiness if isinstance(instance, Sniper) else 0.0,
+        'uses_health': isinstance(instance, Healer),
+        'health': instance.health if isinstance(instance, Healer) else 0,
+        'max_health': instance.max_health if isinstance(instance, Healer) else 0,
+        'cluster': isinstance(instance, Berserker),
+        'convert_chance': instance.chance_to_convert if isinstance(instance, Berserker) else 0.0,
+        'topology': instance.topology,
+    }
+
+
+class BatchEngine:
+    def __init__(self, num_slots, grid_size, max_teams=2, updates_per_frame=1000, max_frames=2000, seed=None, topology='torus'):
+        """
+        num_slots: number of games (K) advanced together.
+        max_teams: largest team count of any matchup that will be played.
+        topology: grid topology shared by every game (see topology.py).
+        updates_per_frame / max_frames: same meaning as in engine.play_game; a game
+        that is not decided after max_frames goes to the team with the most pixels.
+        """
+        self.K = num_slots
+        self.H = self.W = grid_size
+        self.T = max_teams
+        self.updates_per_frame = updates_per_frame
+        self.max_frames = max_frames
+        self.rng = np.random.default_rng(seed)
+
+        # --- Game state, allocated once ---
+        self.grids = np.zeros((self.K, self.H, self.W), dtype=np.int32)
+        self.flat = self.grids.reshape(-1) # View used for gather/scatter by flat index
+        self.num_teams = np.zeros(self.K, dtype=np.int32)
+        self.frames = np.zeros(self.K, dtype=np.int64)
+        self.active = np.zeros(self.K, dtype=bool)
+        self.matchup_ids = np.full(self.K, -1, dtype=np.int64)
+
+        # --- Per-game class tables, indexed [slot, team] ---
+        self.range = np.ones((self.K, self.T), dtype=np.int32)
+        self.pick_tries = np.ones((self.K, self.T), dtype=np.int32)
+        self.defend_chance = np.zeros((self.K, self.T))
+        self.uses_health = np.zeros((self.K, self.T), dtype=bool)
+        self.health = np.zeros((self.K, self.T), dtype=np.int64)
+        self.max_health = np.zeros((self.K, self.T), dtype=np.int64)
+        self.cluster = np.zeros((self.K, self.T), dtype=bool)
+        self.convert_chance = np.zeros((self.K, self.T))
+
+        # Shared neighbor tables, indexed by the flat pixel index within one game
+        self.topology = get_topology(topology, (self.H, self.W))
+        self.cluster_table = self.topology.neighbor_table(1)
+
+    def load(self, slot, team_classes, matchup_id=-1):
+        """Starts a new game in 'slot' with a fresh random grid. team_classes: {team_id: instance} or a list."""
+        if isinstance(team_classes, dict):
+            team_classes = [team_classes[i] for i in range(len(team_classes))]
+        if len(team_classes) > self.T:
+            raise ValueError(f"Matchup has {len(team_classes)} teams but the engine was built for {self.T}")
+
+        self.grids[slot] = self.rng.integers(0, len(team_classes), size=(self.H, self.W), dtype=np.int32)
+        self.num_teams[slot] = len(team_classes)
+        self.frames[slot] = 0
+        self.active[slot] = True
+        self.matchup_ids[slot] = matchup_id
+        for team, instance in enumerate(team_classes):
+            rules = class_rules(instance)
+            if rules['topology'] != self.topology.kind:
+                raise ValueError(f"Matchup plays on '{rules['topology']}' but the engine was built for '{self.topology.kind}'")
+            self.range[slot, team] = rules['range']
+            self.pick_tries[slot, team] = rules['pick_tries']
+            self.defend_chance[slot, team] = rules['defend_chance']
+            self.uses_health[slot, team] = rules['uses_health']
+            self.health[slot, team] = rules['health']
+            self.max_health[slot, team] = rules['max_health']
+            self.cluster[slot, team] = rules['cluster']
+            self.convert_chance[slot, team] = rules['convert_chance']
+
+    def step(self, slots):
+        """Performs one attack in each of the given slots (int array of running games)."""
+        n = len(slots)
+        H, W, rng = self.H, self.W, self.rng
+        base = slots * (H * W)
+
+        # --- Attacker (choose_random_pixel) ---
+        ay = rng.integers(0, H, size=n)
+        ax = rng.integers(0, W, size=n)
+        attacker = self.flat[base + ay * W + ax]
+
+        # --- pick_defender: a neighbor at the class's range, Assassins retry while hitting allies ---
+        attacker_local = ay * W + ax
+        attack_range = self.range[slots, attacker]
+        tries = self.pick_tries[slots, attacker]
+        defender_flat = np.empty(n, dtype=np.int64)
+        searching = np.ones(n, dtype=bool)
+        for attempt in range(int(tries.max())):
+            rows = np.flatnonzero(searching & (attempt < tries))
+            if len(rows) == 0:
+                break
+            pick = rng.integers(0, self.topology.K, size=len(rows))
+            local = np.empty(len(rows), dtype=np.int64)
+            for r in np.unique(attack_range[rows]):
+                sel = attack_range[rows] == r
+                local[sel] = self.topology.neighbor_table(int(r))[attacker_local[rows[sel]], pick[sel]]
+            local = np.where(local >= 0, local, attacker_local[rows]) # Off the map: the attack hits a wall
+            defender_flat[rows] = base[rows] + local
+            searching[rows] = self.flat[defender_flat[rows]] == attacker[rows]
+        defender = self.flat[defender_flat]
+
+        # --- Own team: Healers heal, everything else is a no-op ---
+        same = defender == attacker
+        heal = np.flatnonzero(same & self.uses_health[slots, attacker])
+        if len(heal):
+            hs, ht = slots[heal], attacker[heal]
+            self.health[hs, ht] += self.health[hs, ht] < self.max_health[hs, ht]
+
+        # --- defend: Healer spends health, Sniper is sneaky, default fails ---
+        fight = np.flatnonzero(~same)
+        fs, fd = slots[fight], defender[fight]
+        has_health = self.uses_health[fs, fd] & (self.health[fs, fd] > 0)
+        self.health[fs[has_health], fd[has_health]] -= 1
+        sneaky = rng.random(len(fight)) < self.defend_chance[fs, fd]
+        captured = fight[~(has_health | sneaky)]
+        if len(captured) == 0:
+            return
+
+        # --- attack: single pixel capture, or Berserker cluster conversion ---
+        cluster = self.cluster[slots[captured], attacker[captured]]
+        single = captured[~cluster]
+        self.flat[defender_flat[single]] = attacker[single]
+
+        burst = captured[cluster]
+        if len(burst):
+            cells = self.cluster_table[defender_flat[burst] - base[burst]]
+            on_map = cells >= 0
+            cells = base[burst][:, None] + np.where(on_map, cells, 0)
+            chance = self.convert_chance[slots[burst], attacker[burst]][:, None]
+            convert = on_map & (self.flat[cells] == defender[burst][:, None]) & (rng.random(cells.shape) < chance)
+            self.flat[cells[convert]] = np.broadcast_to(attacker[burst][:, None], cells.shape)[convert]
+
+    def counts(self, slots):
+        """Pixels per team for the given slots, shape (len(slots), T)."""
+        offsets = (np.arange(len(slots)) * self.T)[:, None, None]
+        binned = np.bincount((self.grids[slots] + offsets).ravel(), minlength=len(slots) * self.T)
+        return binned.reshape(len(slots), self.T)
+
+    def run(self, matchups):
+        """
+        Plays every matchup (iterable of team_classes) and yields
+        (matchup_index, winner, frame_count, finished) as games end, in completion order.
+        """
+        source = enumerate(matchups)
+        for slot in range(self.K):
+            next_matchup = next(source, None)
+            if next_matchup is None:
+                break
+            self.load(slot, next_matchup[1], next_matchup[0])
+
+        while self.active.any():
+            slots = np.flatnonzero(self.active)
+            for _ in range(self.updates_per_frame):
+                self.step(slots)
+            self.frames[slots] += 1
+
+            counts = self.counts(slots)
+            alive = np.count_nonzero(counts, axis=1)
+            done = (alive <= 1) | (self.frames[slots] >= self.max_frames)
+            for row in np.flatnonzero(done):
+                slot = slots[row]
+                yield int(self.matchup_ids[slot]), int(np.argmax(counts[row])), int(self.frames[slot]), bool(alive[row] <= 1)
+                self.active[slot] = False
+                next_matchup = next(source, None)
+                if next_matchup is not None:
+                    self.load(slot, next_matchup[1], next_matchup[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many 1v1 class matchups at once with the batched engine.")
+    parser.add_argument(
+        '-k', '--slots',
+        type=int,
+        default=256,
+        help='Number of games advanced together. Default: 256'
+    )
+    parser.add_argument(
+        '-s', '--grid_size',
+        type=int,
+        default=50,
+        help='Side length of the square grid. Default: 50'
+    )
+    parser.add_argument(
+        '-r', '--repeats',
+        type=int,
+        default=100,
+        help='Games per pairing. Default: 100'
+    )
+    parser.add_argument(
+        '-u', '--updates_per_frame',
+        type=int,
+        default=1000,
+        help='Number of pixel "fights" per frame. Default: 1000'
+    )
+    parser.add_argument(
+        '-n', '--max_frames',
+        type=int,
+        default=2000,
+        help='Frames before a stand-still is decided by pixel count. Default: 2000'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed. Default: none'
+    )
+    args = parser.parse_args()
+
+    names = [cls.__name__ for cls in PLAYABLE_CLASSES]
+    pairings = list(itertools.combinations(names, 2))
+    schedule = [pair for pair in pairings for _ in range(args.repeats)]
+    matchups = (
+        [make_team_class(a, 0, level=logging.WARNING), make_team_class(b, 1, level=logging.WARNING)]
+        for a, b in schedule
+    )
+
+    batch = BatchEngine(args.slots, args.grid_size, 2, args.updates_per_frame, args.max_frames, args.seed)
+    wins = {pair: 0 for pair in pairings}
+    stand_stills = 0
+    start = time.perf_counter()
+    for matchup_index, winner, _, finished in batch.run(matchups):
+        wins[schedule[matchup_index]] += winner == 0
+        stand_stills += not finished
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Matchup':<26}Win rate of first class")
+    for (a, b), first_wins in wins.items():
+        print(f"{a + ' vs ' + b:<26}{first_wins / args.repeats * 100:.1f}%")
+    print(f"\n{len(schedule)} games ({stand_stills} decided by pixel count) in {elapsed:.1f}s "
+          f"= {len(schedule) / elapsed:.1f} games/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Runs a whole experiment campaign described in one JSON file, headless and
+resumable.
+
+The spec lists the settings to play; every list is swept (all combinations),
+single values are used as-is:
+    {
+        "grid_size": [50, 100],
+        "num_teams": [2, 4],
+        "classes": [["Berserker", "Sniper"], ["Healer", "Assassin", "Sniper"]],
+        "updates_per_frame": 1000,
+        "max_frames": 2000,
+        "topology": "torus",
+        "seeds": [0, 1],
+        "repeats": 10
+    }
+"classes" is a list of class pools (a single pool may be given as a plain
+list of names); every team gets a random class from the pool. Each
+combination is played 'repeats' times for every seed.
+
+Jobs go into an SQLite queue next to the results (results/<spec name>.sqlite)
+and are played on N worker processes. Every job has a stable key, so running
+the same spec again after a crash or Ctrl+C skips everything that already
+finished and picks up the rest; jobs that were running are simply redone.
+
+Example:
+    python campaign.py my_campaign.json -w 8
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from engine import class_by_name, create_team_classes, play_game, stop_pool
+from topology import TOPOLOGIES
+
+# --- Settings ---
+RESULTS_DIR = "results"
+SWEPT_KEYS = ('grid_size', 'num_teams', 'classes', 'updates_per_frame', 'max_frames', 'topology')
+DEFAULTS = {'updates_per_frame': 1000, 'max_frames': 2000, 'topology': 'torus', 'seeds': [0], 'repeats': 1}
+
+
+def load_spec(filename):
+    """Reads a campaign spec and fills in defaults. Raises ValueError on unknown keys or classes."""
+    with open(filename) as f:
+        spec = {**DEFAULTS, **json.load(f)}
+    unknown = set(spec) - set(SWEPT_KEYS) - {'seeds', 'repeats'}
+    if unknown:
+        raise ValueError(f"Unknown campaign keys: {', '.join(sorted(unknown))}")
+    for key in ('grid_size', 'num_teams', 'classes'):
+        if key not in spec:
+            raise ValueError(f"Campaign spec needs '{key}'")
+    if spec['classes'] and isinstance(spec['classes'][0], str):
+        spec['classes'] = [spec['classes']] # A single pool
+    for pool in spec['classes']:
+        for name in pool:
+            class_by_name(name)
+    for topology in as_list(spec['topology']):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}'. Choose from: {', '.join(TOPOLOGIES)}")
+    if 'hex' in as_list(spec['topology']) and any(size % 2 for size in as_list(spec['grid_size'])):
+        raise ValueError("The hex topology needs an even grid_size")
+    return spec
+
+def as_list(value):
+    return value if isinstance(value, list) else [value]
+
+def expand_jobs(spec):
+    """Every game the spec asks for, as (key, job) pairs. Keys only depend on the job's settings."""
+    swept = [spec['classes']] + [as_list(spec[key]) for key in SWEPT_KEYS if key != 'classes']
+    names = ['classes'] + [key for key in SWEPT_KEYS if key != 'classes']
+    jobs = []
+    for values in itertools.product(*swept):
+        settings = dict(zip(names, values))
+        for seed in as_list(spec['seeds']):
+            for repeat in range(spec['repeats']):
+                job = {**settings, 'seed': seed, 'repeat': repeat}
+                key = hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()
+                job['game_seed'] = int(key[:8], 16) # Different for every game, stable across runs
+                jobs.append((key, job))
+    return jobs
+
+def run_job(job):
+    """Worker: plays one game. Returns a JSON-able result dict."""
+    random.seed(job['game_seed'])
+    np.random.seed(job['game_seed'])
+    pool = [class_by_name(name) for name in job['classes']]
+    team_classes = create_team_classes(job['num_teams'], logging.WARNING, pool, job['topology'])
+    start = time.perf_counter()
+    winner, frames, finished = play_game(team_classes, job['grid_size'], job['updates_per_frame'], job['max_frames'])
+    return {
+        'winner': winner,
+        'winner_class': team_classes[winner].get_name(),
+        'team_classes': [team_classes[i].get_name() for i in range(job['num_teams'])],
+        'frames': frames,
+        'finished': finished,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+class JobQueue:
+    """Persistent job table in SQLite. Only the main process touches it."""
+    def __init__(self, filename):
+        self.db = sqlite3.connect(filename)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "key TEXT PRIMARY KEY, job TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+            "result TEXT, finished_at REAL)"
+        )
+        # Jobs that were running when the last run stopped start over
+        self.db.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+        self.db.commit()
+
+    def add(self, jobs):
+        self.db.executemany(
+            "INSERT OR IGNORE INTO jobs (key, job) VALUES (?, ?)",
+            [(key, json.dumps(job)) for key, job in jobs]
+        )
+        self.db.commit()
+
+    def pending(self, keys):
+        """The given jobs that still have to be played, in spec order."""
+        done = {row[0] for row in self.db.execute("SELECT key FROM jobs WHERE status = 'done'")}
+        return [key for key in keys if key not in done]
+
+    def start(self, key):
+        self.db.execute("UPDATE jobs SET status = 'running' WHERE key = ?", (key,))
+        self.db.commit()
+
+    def finish(self, key, result):
+        self.db.execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE key = ?",
+            (json.dumps(result), time.time(), key)
+        )
+        self.db.commit()
+
+    def results(self, keys):
+        """(job, result) of every finished job among 'keys'."""
+        wanted = set(keys)
+        return [
+            (json.loads(job), json.loads(result))
+            for key, job, result in self.db.execute("SELECT key, job, result FROM jobs WHERE status = 'done'")
+            if key in wanted
+        ]
+
+
+def summarize(results):
+    """Rows of (settings, class, games played, wins, win rate) for every setting combination."""
+    groups = {}
+    for job, result in results:
+        setting = (job['grid_size'], job['num_teams'], ','.join(job['classes']), job['updates_per_frame'], job['max_frames'], job['topology'])
+        group = groups.setdefault(setting, {'games': 0, 'played': {}, 'wins': {}})
+        group['games'] += 1
+        for name in set(result['team_classes']):
+            group['played'][name] = group['played'].get(name, 0) + 1
+        group['wins'][result['winner_class']] = group['wins'].get(result['winner_class'], 0) + 1
+
+    rows = []
+    for setting, group in sorted(groups.items()):
+        for name in sorted(group['played']):
+            wins = group['wins'].get(name, 0)
+            rows.append(list(setting) + [name, group['played'][name], wins, f"{wins / group['played'][name] * 100:.1f}%"])
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a resumable campaign of headless games from a JSON spec.")
+    parser.add_argument(
+        'spec',
+        type=str,
+        help='Campaign spec (JSON)'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes. Default: all CPUs'
+    )
+    parser.add_argument(
+        '-q', '--queue',
+        type=str,
+        default=None,
+        help=f'Job queue database. Default: {RESULTS_DIR}/<spec name>.sqlite'
+    )
+    parser.add_argument(
+        '--csv',
+        action='store_true',
+        help=f'Also save the summary table as a CSV in the "{RESULTS_DIR}" folder.'
+    )
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    spec_name = os.path.splitext(os.path.basename(args.spec))[0]
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    queue_file = args.queue or os.path.join(RESULTS_DIR, f"{spec_name}.sqlite")
+
+    jobs = dict(expand_jobs(spec))
+    queue = JobQueue(queue_file)
+    queue.add(jobs.items())
+    todo = queue.pending(list(jobs))
+    print(f"Campaign '{spec_name}': {len(jobs)} games, {len(jobs) - len(todo)} already done, "
+          f"{len(todo)} to play on {args.workers} workers (queue: {queue_file})")
+
+    played = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            todo_iter = iter(todo)
+            pending = {}
+
+            def fill():
+                for key in itertools.islice(todo_iter, args.workers * 2 - len(pending)):
+                    queue.start(key)
+                    pending[pool.submit(run_job, jobs[key])] = key
+
+            try:
+                fill()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        queue.finish(pending.pop(future), future.result())
+                        played += 1
+                        if played % 50 == 0 or played == len(todo):
+                            elapsed = time.perf_counter() - start
+                            print(f"  {played}/{len(todo)} games ({played / elapsed:.1f} games/s)")
+                    fill()
+            except KeyboardInterrupt:
+                stop_pool(pool) # Leaving the block would wait for every game already sent to the pool
+                raise
+    except KeyboardInterrupt:
+        print(f"\nStopped after {played} games. Run the same command again to continue.")
+
+    header = ["Grid", "Teams", "Class pool", "Updates", "Max frames", "Topology", "Class", "Games", "Wins", "Win rate"]
+    rows = [[str(cell) for cell in row] for row in summarize(queue.results(list(jobs)))]
+    if rows:
+        widths = [max(len(row[c]) for row in [header] + rows) for c in range(len(header))]
+        print()
+        for row in [header] + rows:
+            print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    if args.csv:
+        filename = os.path.join(RESULTS_DIR, f"{spec_name}_summary.csv")
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Summary saved to '{filename}'")
+
+if __name__ == "__main__":
+    main()
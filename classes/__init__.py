@@ -2,10 +2,13 @@
 """This module defines the Class class which is used to define the mechanics of each team in the game. Each class has unique attributes and methods that dictate how they interact with the game environment and other classes.
 
 By default, the Class class provides basic attack, defend (always fail defense), and pick_defender methods (range of 1) that can be overridden by subclasses to implement specific behaviors for different teams.
+
+The fire_* attributes describe how a team reacts to the optional fire field (see fire.py); subclasses can change them to ignite more easily, resist or be damaged less by fire.
 """
 
 import logging
-import random
+
+from topology import get_topology
 
 class Class:
     def __init__(self, team_id, level=logging.INFO):
@@ -14,6 +17,12 @@ class Class:
         """
         self.team_id = team_id
         self.range = 1
+        self.topology = 'torus' # Grid topology name (see topology.py), the same for every team in a game
+        self.fire_ignition = 1.0 # Multiplier on the chance that a spark sets this team's pixels alight
+        self.fire_resistance = 0.0 # Chance to not catch fire from a burning neighbor
+        self.fire_damage = 0.5 # Chance that a pixel is lost when the fire on it burns out
+        self._grid_topology = None # Topology object for the current grid, see grid_topology()
+        self._heatmap = None # ContentionHeatmap for attacks that capture more than the defender's pixel, set by run_simulation() while it records
         self.logger = logging.getLogger(__name__) # create logger
         self.logger.setLevel(level) # set logging level
 
@@ -49,11 +58,17 @@ class Class:
         """
         Default pick defender logic
         """
-        dy = random.choice([-self.range, 0, 1*self.range])
-        dx = random.choice([-self.range, 0, self.range])
-        defender_y = (attacker_y + dy) % grid.shape[0]
-        defender_x = (attacker_x + dx) % grid.shape[1]
-        return defender_y, defender_x
+        return self.grid_topology(grid).random_neighbor(attacker_y, attacker_x, self.range)
+
+    def grid_topology(self, grid):
+        """
+        Returns the Topology for this team's topology name and the grid's size,
+        looked up once and reused until either of them changes
+        """
+        topology = self._grid_topology
+        if topology is None or topology.kind != self.topology or topology.shape != grid.shape:
+            topology = self._grid_topology = get_topology(self.topology, grid.shape)
+        return topology
     
     def get_name(self):
         """
@@ -5,7 +5,6 @@ This module defines the Assassin class, a subclass of Class
 TODO improve description
 """
 
-import random
 import logging
 from . import Class
 
@@ -22,14 +21,12 @@ class Assassin(Class):
         """
         Assassin pick defender logic
         """
+        topology = self.grid_topology(grid)
         pickedEnemy = False
         counter = 0
         num_tries = 3
         while not pickedEnemy and counter < num_tries:
-            dy = random.choice([-self.range, 0, 1*self.range])
-            dx = random.choice([-self.range, 0, self.range])
-            defender_y = (attacker_y + dy) % grid.shape[0]
-            defender_x = (attacker_x + dx) % grid.shape[1]
+            defender_y, defender_x = topology.random_neighbor(attacker_y, attacker_x, self.range)
             if grid[defender_y, defender_x] != self.team_id:
                 pickedEnemy = True
             counter += 1
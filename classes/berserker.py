@@ -26,15 +26,14 @@ class Berserker(Class):
         defense = defender.defend(grid, defender_y, defender_x, self, attacker_y, attacker_x)
         if defense == 0: # Defense failed, capture the pixel
             # attack converts cluster of defender's allies to Berserker's team
-            for dy in [-1, 0, 1]:
-                for dx in [-1, 0, 1]:
-                    ny = (defender_y + dy) % grid.shape[0]
-                    nx = (defender_x + dx) % grid.shape[1]
-                    if grid[ny, nx] == defender.team_id:
-                        # random chance of taking over defender and neighboring allies
-                        if random.random() < self.chance_to_convert:
-                            grid[ny, nx] = self.team_id
-                            self.logger.debug(f"Pixel at ({ny}, {nx}) captured by team {self.team_id} ({self.__class__.__name__})")
+            for ny, nx in self.grid_topology(grid).neighbors(defender_y, defender_x):
+                if grid[ny, nx] == defender.team_id:
+                    # random chance of taking over defender and neighboring allies
+                    if random.random() < self.chance_to_convert:
+                        grid[ny, nx] = self.team_id
+                        if self._heatmap is not None:
+                            self._heatmap.record(ny * grid.shape[1] + nx, True)
+                        self.logger.debug(f"Pixel at ({ny}, {nx}) captured by team {self.team_id} ({self.__class__.__name__})")
             return 1 # Attack successful
         elif defense == 1: # Defense successful, no capture
             self.logger.debug(f"Pixel at ({defender_y}, {defender_x}) defended by team {defender.team_id} ({defender.__class__.__name__})")
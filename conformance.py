@@ -0,0 +1,354 @@
+"""
+Statistical conformance check of a faster engine against the reference engine
+(run_simulation() and the Class methods), so performance work cannot quietly
+change game balance.
+
+Two kinds of checks, all seeded:
+    positions  small fixed 2-team positions; one attack is played from the same
+               position thousands of times by both engines and the outcomes are
+               compared: capture rate, pixels converted per attack and the full
+               outcome distribution (pixel change and Healer health after the attack)
+    games      many short 1v1 games per class pairing; win rates and game
+               lengths (in attacks) are compared
+Every comparison is a two-sample test (two-proportion z-test, Welch z-test,
+chi-square homogeneity, Kolmogorov-Smirnov). The run fails (exit code 1) if any
+p-value is below alpha divided by the number of comparisons (Bonferroni).
+
+Candidates:
+    batch      batch_engine.BatchEngine (positions and games)
+    sync       sync_engine.SyncEngine (games only: a generation is not a single attack)
+    reference  the reference engine again with other seeds, to check the harness itself
+
+Example:
+    python conformance.py -c batch
+"""
+
+import argparse
+import collections
+import itertools
+import logging
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_engine import BatchEngine
+from engine import make_team_class, play_game, count_teams, init_grid, run_simulation, PLAYABLE_CLASSES
+from sync_engine import SyncEngine
+
+CANDIDATES = ('batch', 'sync', 'reference')
+POSITION_SIZE = 12 # Side length of the controlled positions
+MIN_EXPECTED = 5 # Outcome bins expected to hold fewer samples are merged for the chi-square test
+
+
+# --- Two-sample tests (p-values) ---
+def normal_p(z):
+    """Two-sided p-value of a standard normal statistic."""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+def chi_square_sf(x, df):
+    """Upper tail of the chi-square distribution (regularized upper incomplete gamma function)."""
+    if x <= 0:
+        return 1.0
+    a, x = df / 2, x / 2
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1: # Series for the lower tail
+        term = total = 1 / a
+        n = a
+        while abs(term) > abs(total) * 1e-15:
+            n += 1
+            term *= x / n
+            total += term
+        return max(0.0, 1 - total * math.exp(log_prefix))
+    # Continued fraction for the upper tail (modified Lentz)
+    b = x + 1 - a
+    c = 1 / 1e-300
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1 / (d if abs(d) > 1e-300 else 1e-300)
+        c = b + an / c
+        c = c if abs(c) > 1e-300 else 1e-300
+        h *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+def proportion_test(successes_a, n_a, successes_b, n_b):
+    """Two-proportion z-test."""
+    pooled = (successes_a + successes_b) / (n_a + n_b)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    if se == 0:
+        return 1.0
+    return normal_p((successes_a / n_a - successes_b / n_b) / se)
+
+def mean_test(a, b):
+    """Welch z-test for equal means (large samples)."""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    se = math.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    if se == 0:
+        return 1.0 if a.mean() == b.mean() else 0.0
+    return normal_p((a.mean() - b.mean()) / se)
+
+def chi_square_test(counts_a, counts_b):
+    """Chi-square test that two Counters of outcomes come from the same distribution."""
+    n_a, n_b = sum(counts_a.values()), sum(counts_b.values())
+    outcomes = sorted(set(counts_a) | set(counts_b), key=lambda k: counts_a[k] + counts_b[k], reverse=True)
+    table = [[counts_a[k], counts_b[k]] for k in outcomes]
+
+    # Merge the rarest outcomes into one bin until every bin is large enough
+    min_share = min(n_a, n_b) / (n_a + n_b)
+    while len(table) > 1 and sum(table[-1]) * min_share < MIN_EXPECTED:
+        last = table.pop()
+        table[-1] = [table[-1][0] + last[0], table[-1][1] + last[1]]
+    if len(table) < 2:
+        return 1.0
+
+    statistic = 0.0
+    for row_a, row_b in table:
+        row_total = row_a + row_b
+        for observed, n in ((row_a, n_a), (row_b, n_b)):
+            expected = row_total * n / (n_a + n_b)
+            statistic += (observed - expected) ** 2 / expected
+    return chi_square_sf(statistic, len(table) - 1)
+
+def ks_test(a, b):
+    """Two-sample Kolmogorov-Smirnov test (asymptotic p-value)."""
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    d = np.max(np.abs(np.searchsorted(a, values, side='right') / len(a)
+                      - np.searchsorted(b, values, side='right') / len(b)))
+    n = len(a) * len(b) / (len(a) + len(b))
+    lam = (math.sqrt(n) + 0.12 + 0.11 / math.sqrt(n)) * d
+    if lam < 0.2:
+        return 1.0
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return min(max(p, 0.0), 1.0)
+
+
+# --- Controlled positions ---
+def build_positions(seed):
+    """
+    One position per class pairing, plus a second one with full Healer health
+    for pairings that include a Healer. Returns [(label, class_names, healer_health, grid)].
+    """
+    rng = np.random.default_rng(seed)
+    names = [cls.__name__ for cls in PLAYABLE_CLASSES]
+    positions = []
+    for pair in itertools.combinations(names, 2):
+        grid = rng.integers(0, 2, size=(POSITION_SIZE, POSITION_SIZE), dtype=np.int32)
+        health_levels = [0, 'max'] if 'Healer' in pair else [0]
+        for health in health_levels:
+            label = f"{pair[0]} vs {pair[1]}" + (" (full health)" if health == 'max' else "")
+            positions.append((label, pair, health, grid))
+    return positions
+
+def position_classes(class_names, healer_health):
+    team_classes = {team: make_team_class(name, team, level=logging.WARNING) for team, name in enumerate(class_names)}
+    for instance in team_classes.values():
+        if hasattr(instance, 'health'):
+            instance.health = instance.max_health if healer_health == 'max' else healer_health
+    return team_classes
+
+def team_health(team_classes):
+    return tuple(getattr(team_classes[t], 'health', 0) for t in range(len(team_classes)))
+
+def reference_attacks(position, team_classes, trials, seed):
+    """Plays one run_simulation() attack 'trials' times from the position. Returns [(pixel_change, health)]."""
+    random.seed(seed)
+    np.random.seed(seed)
+    start_counts = count_teams(position, 2)
+    start_state = {t: dict(vars(instance)) for t, instance in team_classes.items()}
+    grid = np.empty_like(position)
+    height, width = position.shape
+    outcomes = []
+    for _ in range(trials):
+        grid[...] = position
+        for t, instance in team_classes.items():
+            vars(instance).update(start_state[t])
+        run_simulation(grid, width, height, team_classes, None)
+        outcomes.append((int(count_teams(grid, 2)[0] - start_counts[0]), team_health(team_classes)))
+    return outcomes
+
+def batch_attacks(position, team_classes, trials, seed):
+    """Same as reference_attacks, with every trial in its own BatchEngine slot and one batched step."""
+    batch = BatchEngine(trials, POSITION_SIZE, 2, seed=seed)
+    for slot in range(trials):
+        batch.load(slot, team_classes)
+    batch.grids[...] = position
+    batch.step(np.arange(trials))
+    changes = batch.counts(np.arange(trials))[:, 0] - count_teams(position, 2)[0]
+    return [(int(change), tuple(int(h) for h in health)) for change, health in zip(changes, batch.health)]
+
+
+# --- Games ---
+def reference_game(class_names, grid_size, updates_per_frame, max_frames, seed):
+    """Worker: one reference game. Returns (winner, attacks played)."""
+    team_classes = {team: make_team_class(name, team, level=logging.WARNING) for team, name in enumerate(class_names)}
+    winner, frames, _ = play_game(team_classes, grid_size, updates_per_frame, max_frames, seed=seed)
+    return winner, frames * updates_per_frame
+
+def sync_game(class_names, grid_size, updates_per_frame, max_frames, seed):
+    """Worker: one synchronous game with the same attack budget. Returns (winner, attacks played)."""
+    random.seed(seed)
+    np.random.seed(seed)
+    team_classes = {team: make_team_class(name, team, level=logging.WARNING) for team, name in enumerate(class_names)}
+    grid = init_grid(grid_size, grid_size, len(class_names))
+    engine = SyncEngine(grid.shape, team_classes, seed=seed)
+    max_generations = math.ceil(max_frames * updates_per_frame / grid.size)
+    generations = 0
+    counts = count_teams(grid, len(class_names))
+    while generations < max_generations and np.count_nonzero(counts) > 1:
+        engine.step(grid)
+        generations += 1
+        counts = count_teams(grid, len(class_names))
+    return int(np.argmax(counts)), generations * grid.size
+
+def batch_games(schedule, args, seed):
+    """Plays the whole schedule with the batched engine. Returns [(winner, attacks played)] in schedule order."""
+    batch = BatchEngine(min(len(schedule), 512), args.grid_size, 2, args.updates_per_frame, args.max_frames, seed)
+    matchups = ([make_team_class(name, team, level=logging.WARNING) for team, name in enumerate(pair)] for pair in schedule)
+    results = [None] * len(schedule)
+    for matchup_index, winner, frames, _ in batch.run(matchups):
+        results[matchup_index] = (winner, frames * args.updates_per_frame)
+    return results
+
+def pool_games(worker, schedule, args, seeds, pool):
+    futures = [
+        pool.submit(worker, pair, args.grid_size, args.updates_per_frame, args.max_frames, seed)
+        for pair, seed in zip(schedule, seeds)
+    ]
+    return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a faster engine plays by the same odds as the reference engine.")
+    parser.add_argument(
+        '-c', '--candidate',
+        type=str,
+        choices=CANDIDATES,
+        default='batch',
+        help='Engine to compare against the reference. Default: batch'
+    )
+    parser.add_argument(
+        '-a', '--attacks',
+        type=int,
+        default=5000,
+        help='Attacks played from each controlled position by each engine. Default: 5000'
+    )
+    parser.add_argument(
+        '-g', '--games',
+        type=int,
+        default=100,
+        help='Games per class pairing for each engine. Default: 100'
+    )
+    parser.add_argument(
+        '-s', '--grid_size',
+        type=int,
+        default=16,
+        help='Side length of the square grid for each game. Default: 16'
+    )
+    parser.add_argument(
+        '-u', '--updates_per_frame',
+        type=int,
+        default=100,
+        help='Number of pixel "fights" per frame. Default: 100'
+    )
+    parser.add_argument(
+        '-n', '--max_frames',
+        type=int,
+        default=200,
+        help='Frames before a stand-still is decided by pixel count. Default: 200'
+    )
+    parser.add_argument(
+        '--alpha',
+        type=float,
+        default=0.01,
+        help='Chance of a false failure for the whole run (Bonferroni corrected). Default: 0.01'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes for the game checks. Default: all CPUs'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Base random seed. Default: 0'
+    )
+    args = parser.parse_args()
+
+    checks = [] # (check, reference value, candidate value, p-value)
+
+    # --- Controlled positions ---
+    if args.candidate == 'sync':
+        print("Skipping controlled positions: a sync generation is not a single attack.")
+    else:
+        for index, (label, class_names, health, position) in enumerate(build_positions(args.seed)):
+            print(f"Position {label}: {args.attacks} attacks per engine...")
+            reference = reference_attacks(position, position_classes(class_names, health), args.attacks, args.seed + index)
+            if args.candidate == 'batch':
+                candidate = batch_attacks(position, position_classes(class_names, health), args.attacks, args.seed + index)
+            else:
+                candidate = reference_attacks(position, position_classes(class_names, health), args.attacks, args.seed + index + 10**6)
+
+            ref_changed = [abs(change) for change, _ in reference]
+            cand_changed = [abs(change) for change, _ in candidate]
+            ref_captures = sum(c > 0 for c in ref_changed)
+            cand_captures = sum(c > 0 for c in cand_changed)
+            checks.append((f"{label}: capture rate", f"{ref_captures / len(reference):.3f}", f"{cand_captures / len(candidate):.3f}",
+                           proportion_test(ref_captures, len(reference), cand_captures, len(candidate))))
+            checks.append((f"{label}: pixels per attack", f"{np.mean(ref_changed):.3f}", f"{np.mean(cand_changed):.3f}",
+                           mean_test(ref_changed, cand_changed)))
+            checks.append((f"{label}: outcome distribution", "-", "-",
+                           chi_square_test(collections.Counter(reference), collections.Counter(candidate))))
+
+    # --- Games ---
+    names = [cls.__name__ for cls in PLAYABLE_CLASSES]
+    schedule = [pair for pair in itertools.combinations(names, 2) for _ in range(args.games)]
+    print(f"Playing {len(schedule)} games per engine...")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        reference = pool_games(reference_game, schedule, args, range(args.seed, args.seed + len(schedule)), pool)
+        candidate_seeds = range(args.seed + 10**6, args.seed + 10**6 + len(schedule))
+        if args.candidate == 'batch':
+            candidate = batch_games(schedule, args, args.seed)
+        elif args.candidate == 'sync':
+            candidate = pool_games(sync_game, schedule, args, candidate_seeds, pool)
+        else:
+            candidate = pool_games(reference_game, schedule, args, candidate_seeds, pool)
+
+    for pair in itertools.combinations(names, 2):
+        rows = [i for i, scheduled in enumerate(schedule) if scheduled == pair]
+        ref_wins = sum(reference[i][0] == 0 for i in rows)
+        cand_wins = sum(candidate[i][0] == 0 for i in rows)
+        label = f"{pair[0]} vs {pair[1]}"
+        checks.append((f"{label}: first class win rate", f"{ref_wins / len(rows):.2f}", f"{cand_wins / len(rows):.2f}",
+                       proportion_test(ref_wins, len(rows), cand_wins, len(rows))))
+        ref_lengths = [reference[i][1] for i in rows]
+        cand_lengths = [candidate[i][1] for i in rows]
+        checks.append((f"{label}: game length (attacks)", f"{np.median(ref_lengths):.0f}", f"{np.median(cand_lengths):.0f}",
+                       ks_test(ref_lengths, cand_lengths)))
+
+    # --- Report ---
+    threshold = args.alpha / len(checks)
+    header = ["Check", "Reference", args.candidate.capitalize(), "p-value", "Result"]
+    rows = [[check, ref, cand, f"{p:.2g}", "FAIL" if p < threshold else "ok"] for check, ref, cand, p in checks]
+    widths = [max(len(row[c]) for row in [header] + rows) for c in range(len(header))]
+    print()
+    for row in [header] + rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    failures = sum(p < threshold for _, _, _, p in checks)
+    print(f"\n{len(checks)} checks at p < {threshold:.2g} (alpha {args.alpha} / {len(checks)}): {failures} failed")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Adaptive rating ladder: a power ranking of classes (and tuned parameter sets)
+from as few headless games as possible.
+
+Every entrant has a Glicko rating: an Elo-scale rating plus a rating deviation
+(RD) that says how uncertain it still is. Instead of a round-robin, the next
+game is always the pairing whose result is expected to shrink the total rating
+variance the most, so well-known matchups stop getting games and close or
+uncertain ones get the attention. Games run continuously on a process pool
+until every RD is below --target_rd, --max_games is reached or Ctrl+C.
+
+Ratings are saved to a JSON file in the results folder and picked up again on
+the next run, so the ladder can be extended with new entrants at any time.
+
+Example:
+    python elo_ladder.py -e Berserker -e Healer -e Sniper -e Assassin -e "Sniper:range=12,sneakiness=0.5"
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from engine import make_team_class, play_duel, stop_pool, PLAYABLE_CLASSES
+
+# --- Settings ---
+RESULTS_DIR = "results"
+LADDER_FILE = "ladder.json"
+INITIAL_RATING = 1500.0
+INITIAL_RD = 350.0
+Q = math.log(10) / 400
+
+
+def parse_entrant(spec):
+    """Parses 'Class' or 'Class:attr=value,attr=value'. Returns (class_name, params)."""
+    class_name, _, params_spec = spec.partition(':')
+    params = {}
+    for item in filter(None, params_spec.split(',')):
+        try:
+            attr, value = item.split('=')
+            params[attr] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected Class:attr=value,..., got '{spec}'")
+    return class_name, params
+
+def entrant_id(class_name, params):
+    """Stable name for an entrant, used as its key in the ladder file."""
+    if not params:
+        return class_name
+    return f"{class_name}({', '.join(f'{k}={v:g}' for k, v in sorted(params.items()))})"
+
+
+# --- Glicko ---
+def g(rd):
+    return 1 / math.sqrt(1 + 3 * Q * Q * rd * rd / math.pi ** 2)
+
+def expected_score(rating, opponent_rating, opponent_rd):
+    return 1 / (1 + 10 ** (-g(opponent_rd) * (rating - opponent_rating) / 400))
+
+def game_variance(rating, opponent_rating, opponent_rd):
+    """d^2: the rating variance one game against this opponent is worth."""
+    e = expected_score(rating, opponent_rating, opponent_rd)
+    return 1 / (Q * Q * g(opponent_rd) ** 2 * e * (1 - e))
+
+class Ladder:
+    def __init__(self, settings):
+        """settings: game settings the ratings belong to (grid size, updates, max frames)."""
+        self.settings = settings
+        self.players = {} # id -> {'class', 'params', 'rating', 'rd', 'games', 'wins'}
+
+    def add(self, class_name, params):
+        key = entrant_id(class_name, params)
+        self.players.setdefault(key, {
+            'class': class_name, 'params': params,
+            'rating': INITIAL_RATING, 'rd': INITIAL_RD, 'games': 0, 'wins': 0,
+        })
+        return key
+
+    def record(self, a, b, score_a):
+        """Updates both ratings after one game (score_a: 1 if a won, 0 if b won)."""
+        pa, pb = self.players[a], self.players[b]
+        updates = []
+        for player, opponent, score in ((pa, pb, score_a), (pb, pa, 1 - score_a)):
+            e = expected_score(player['rating'], opponent['rating'], opponent['rd'])
+            d2 = game_variance(player['rating'], opponent['rating'], opponent['rd'])
+            variance = 1 / (1 / player['rd'] ** 2 + 1 / d2)
+            updates.append((player, player['rating'] + Q * variance * g(opponent['rd']) * (score - e), math.sqrt(variance), score))
+        for player, rating, rd, score in updates: # Both sides use the ratings from before the game
+            player['rating'], player['rd'] = rating, rd
+            player['games'] += 1
+            player['wins'] += score
+
+    def information_gain(self, a, b, pending_rd):
+        """Total rating variance one more a-vs-b game is expected to remove."""
+        gain = 0.0
+        for player, opponent in ((a, b), (b, a)):
+            rd = pending_rd[player]
+            d2 = game_variance(self.players[player]['rating'], self.players[opponent]['rating'], pending_rd[opponent])
+            gain += rd * rd - 1 / (1 / (rd * rd) + 1 / d2)
+        return gain
+
+    def next_pairing(self, entrants, pending):
+        """
+        The pairing worth the most information, counting games that are still
+        running as if they had already shrunk the RDs they will shrink.
+        """
+        pending_rd = {key: self.players[key]['rd'] for key in entrants}
+        for a, b in pending:
+            for player, opponent in ((a, b), (b, a)):
+                d2 = game_variance(self.players[player]['rating'], self.players[opponent]['rating'], pending_rd[opponent])
+                pending_rd[player] = math.sqrt(1 / (1 / pending_rd[player] ** 2 + 1 / d2))
+        return max(itertools.combinations(entrants, 2), key=lambda pair: self.information_gain(*pair, pending_rd))
+
+    # --- Storage ---
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({'settings': self.settings, 'players': self.players}, f, indent=1)
+
+    @classmethod
+    def load(cls, filename, settings):
+        ladder = cls(settings)
+        if os.path.exists(filename):
+            with open(filename) as f:
+                stored = json.load(f)
+            if stored['settings'] != settings:
+                raise SystemExit(f"'{filename}' holds ratings for other game settings {stored['settings']}; use another --file")
+            ladder.players = stored['players']
+        return ladder
+
+    def print_table(self, entrants):
+        ranked = sorted(entrants, key=lambda key: self.players[key]['rating'], reverse=True)
+        width = max(len(key) for key in ranked)
+        print(f"\n{'#':<4}{'Entrant':<{width + 2}}{'Rating':>8}{'+/-':>7}{'Games':>8}{'Win rate':>10}")
+        for place, key in enumerate(ranked, 1):
+            p = self.players[key]
+            win_rate = f"{p['wins'] / p['games'] * 100:.1f}%" if p['games'] else "-"
+            print(f"{place:<4}{key:<{width + 2}}{p['rating']:>8.0f}{2 * p['rd']:>7.0f}{p['games']:>8}{win_rate:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive Glicko rating ladder for classes and parameter sets.")
+    parser.add_argument(
+        '-e', '--entrant',
+        type=parse_entrant,
+        action='append',
+        default=None,
+        help='Class or Class:attr=value,... to rate (repeatable). Default: every playable class'
+    )
+    parser.add_argument(
+        '-f', '--file',
+        type=str,
+        default=os.path.join(RESULTS_DIR, LADDER_FILE),
+        help=f'Where ratings are kept between runs. Default: {os.path.join(RESULTS_DIR, LADDER_FILE)}'
+    )
+    parser.add_argument(
+        '-r', '--target_rd',
+        type=float,
+        default=30.0,
+        help='Stop once every rating deviation is below this. Default: 30'
+    )
+    parser.add_argument(
+        '-g', '--max_games',
+        type=int,
+        default=2000,
+        help='Most games played in this run. Default: 2000'
+    )
+    parser.add_argument(
+        '-s', '--grid_size',
+        type=int,
+        default=50,
+        help='Side length of the square grid for each game. Default: 50'
+    )
+    parser.add_argument(
+        '-u', '--updates_per_frame',
+        type=int,
+        default=1000,
+        help='Number of pixel "fights" per frame. Default: 1000'
+    )
+    parser.add_argument(
+        '-n', '--max_frames',
+        type=int,
+        default=2000,
+        help='Frames before a stand-still is decided by pixel count. Default: 2000'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes. Default: all CPUs'
+    )
+    parser.add_argument(
+        '--report',
+        type=int,
+        default=100,
+        help='Print the ranking every this many games. Default: 100'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base random seed. Default: random'
+    )
+    args = parser.parse_args()
+
+    entrant_specs = args.entrant or [(cls.__name__, {}) for cls in PLAYABLE_CLASSES]
+    for class_name, params in entrant_specs:
+        make_team_class(class_name, 0, params) # Fail fast on typos before starting the pool
+    if len(entrant_specs) < 2:
+        parser.error("At least two entrants are needed")
+
+    settings = {'grid_size': args.grid_size, 'updates_per_frame': args.updates_per_frame, 'max_frames': args.max_frames}
+    os.makedirs(os.path.dirname(args.file) or '.', exist_ok=True)
+    ladder = Ladder.load(args.file, settings)
+    entrants = [ladder.add(class_name, params) for class_name, params in entrant_specs]
+    seeds = itertools.count(args.seed if args.seed is not None else random.getrandbits(32))
+
+    def settled():
+        return all(ladder.players[key]['rd'] < args.target_rd for key in entrants)
+
+    print(f"Rating {len(entrants)} entrants on {args.workers} workers (stops at RD < {args.target_rd:g} "
+          f"or {args.max_games} games, Ctrl+C to stop early)...")
+    played = 0
+    submitted = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            pending = {}
+
+            def fill():
+                nonlocal submitted
+                while len(pending) < args.workers * 2 and submitted < args.max_games and not settled():
+                    a, b = ladder.next_pairing(entrants, pending.values())
+                    future = pool.submit(
+                        play_duel, (ladder.players[a]['class'], ladder.players[a]['params']),
+                        (ladder.players[b]['class'], ladder.players[b]['params']),
+                        args.grid_size, args.updates_per_frame, args.max_frames, next(seeds)
+                    )
+                    pending[future] = (a, b)
+                    submitted += 1
+
+            try:
+                fill()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        a, b = pending.pop(future)
+                        ladder.record(a, b, future.result())
+                        played += 1
+                        if played % args.report == 0:
+                            ladder.print_table(entrants)
+                            ladder.save(args.file)
+                    fill()
+            except KeyboardInterrupt:
+                stop_pool(pool) # Leaving the block would wait for every game already sent to the pool
+                raise
+    except KeyboardInterrupt:
+        print("\nStopped early.")
+
+    ladder.print_table(entrants)
+    ladder.save(args.file)
+    print(f"\n{played} games played this run. Ratings saved to '{args.file}'")
+
+if __name__ == "__main__":
+    main()
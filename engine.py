@@ -0,0 +1,435 @@
+"""
+Headless simulation core for Pixels Fighting.
+
+Everything needed to set up and advance a game without a window lives here, so
+the pygame front end (pixels-fighting.py) and offline tools (exporter.py) share
+the exact same rules.
+"""
+
+import numpy as np
+import random
+import logging
+import json
+from functools import lru_cache
+
+from classes import * # Importing classes module
+from topology import get_topology
+
+# --- Settings ---
+DEAD_COLOR = (173, 173, 173) # Gray for dead pixels
+#possible_classes = ["Berserker", "Sniper", "Assassin", "Bunker", "Phalanx", "Thorns", "Plague", "Nomad", "Necromancer", "Healer", "Mortar"]
+# TODO fix/add all classes back
+PLAYABLE_CLASSES = [Berserker, Healer, Sniper, Assassin]
+INIT_BLOCK_ROWS = 16 # Rows refilled per random draw by init_grid(out=...)
+
+# --- Color conversion constants (same values colormath uses for LCHab(D50) -> sRGB) ---
+D50_WHITE = np.array([0.96422, 1.00000, 0.82521])
+D65_WHITE = np.array([0.95047, 1.00000, 1.08883])
+BRADFORD = np.array([
+    [0.8951, 0.2664, -0.1614],
+    [-0.7502, 1.7135, 0.0367],
+    [0.0389, -0.0685, 1.0296]
+])
+XYZ_TO_SRGB = np.array([
+    [3.24071, -1.53726, -0.498571],
+    [-0.969258, 1.87599, 0.0415557],
+    [0.0556352, -0.203996, 1.05707]
+])
+CIE_E = 216.0 / 24389.0
+
+def init_grid(width, height, num_teams, out=None):
+    """
+    Creates a new grid with random team assignments.
+    If 'out' is given, it is refilled in place instead (used by resets), a block
+    of rows at a time, so only a block-sized temporary is allocated. The draws
+    are the same as for a new grid with the same seed.
+    """
+    if out is None:
+        return np.random.randint(0, num_teams, size=(height, width), dtype=np.int32)
+    for start in range(0, height, INIT_BLOCK_ROWS):
+        rows = out[start:start + INIT_BLOCK_ROWS]
+        rows[...] = np.random.randint(0, num_teams, size=rows.shape, dtype=np.int32)
+    return out
+
+def choose_random_pixel(grid_width, grid_height):
+    """Chooses a random pixel coordinate within the grid."""
+    y = random.randint(0, grid_height - 1)
+    x = random.randint(0, grid_width - 1)
+    return y, x
+
+def choose_random_nearby_pixel(y, x, grid_width, grid_height, range=1, topology='torus'):
+    """Chooses a random pixel at offset {-range, 0, range} in each direction (wrapping around edges on a torus)."""
+    return get_topology(topology, (grid_height, grid_width)).random_neighbor(y, x, range)
+
+def attack(grid, grid_width, grid_height, attacker_y, attacker_x, defender_y, defender_x, team_classes, hitpoints):
+    """
+    Executes an attack from attacker to defender.
+    """
+    attacker_team = grid[attacker_y, attacker_x]
+    if attacker_team < 0:
+        return # dead pixel cannot attack
+    attacker_class = team_classes[attacker_team]
+    defender_team = grid[defender_y, defender_x]
+    if defender_team < 0:
+        grid[attacker_y, attacker_x] = defender_team # attacker becomes dead necromancer
+        grid[defender_y, defender_x] = -1*defender_team # dead necromancer comes alive
+        return
+    defender_class = team_classes[defender_team]
+    neighbors = get_topology('torus', (grid_height, grid_width)).neighbors # 3x3 block, wrapping around edges
+
+    if defender_team == attacker_team:
+        if attacker_class == "Healer":
+            hitpoints[attacker_team] += 1 # Healer heals its collective
+        if attacker_class != "Plague":
+            return
+    
+    # --- Defensive mechanics apply first ---
+    
+    if defender_class == "Healer":
+        if hitpoints[defender_team] > 0:
+            hitpoints[defender_team] -= 1 # Healer uses hitpoint to survive
+            return
+    
+    if defender_class == "Bunker":
+        if random.random() < 0.5:
+            return # 50% chance to block attack
+    
+    if defender_class == "Thorns":
+        if random.random() < 0.3:
+            grid[attacker_y, attacker_x] = defender_team # Reflect attack
+            return
+    
+    if defender_class == "Phalanx":
+        # count adjacent allies
+        ally_count = 0
+        for ny, nx in neighbors(defender_y, defender_x):
+            if (ny, nx) != (defender_y, defender_x) and grid[ny, nx] == defender_team:
+                ally_count += 1
+        if ally_count >= 4:
+            return # Phalanx defended successfully
+    
+    if defender_class == "Sniper":
+        if random.random() < 0.4: # Sniper is sneaky
+            return
+        
+    # --- Attacker mechanics apply second ---
+        
+    if attacker_class == "Berserker":
+        # attack converts cluster of pixels
+        for ny, nx in neighbors(defender_y, defender_x):
+            if grid[ny, nx] == defender_team:
+                # random chance of taking over neighboring allies of defender
+                if random.random() < 0.3:
+                    grid[ny, nx] = attacker_team
+        return
+    
+    if attacker_class == "Mortar":
+        # attack affects a 3x3 area
+        for ny, nx in neighbors(defender_y, defender_x):
+            if random.random() < 0.3: # chance to convert each pixel in area
+                grid[ny, nx] = attacker_team
+        return
+    
+    if attacker_class == "Plague":
+        # newly converted pixels have a chance to convert neighbors
+        grid[defender_y, defender_x] = attacker_team
+        if random.random() < 0.5:
+            attack(grid, grid_width, grid_height, defender_y, defender_x, *choose_random_nearby_pixel(defender_y, defender_x, grid_width, grid_height, range=1), team_classes, hitpoints)
+    
+    if attacker_class == "Nomad":
+        # swap places up to 7 spaces away before attacking, and immune to defense
+        swap_y, swap_x = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=7)
+        grid[attacker_y, attacker_x], grid[swap_y, swap_x] = grid[swap_y, swap_x], grid[attacker_y, attacker_x]
+        grid[choose_random_nearby_pixel(swap_y, swap_x, grid_width, grid_height, range=1)] = attacker_team
+        return
+    
+    if attacker_class == "Necromancer":
+        # converts defender into a dead gray pixel, which doesn't do anything until attacked, when it turns into a necromancer pixel
+        grid[defender_y, defender_x] = -1 * attacker_team # dead pixel
+        return
+
+    # Default attack
+    grid[defender_y, defender_x] = attacker_team
+
+
+def run_simulation(grid, grid_width, grid_height, team_classes, hitpoints, heatmap=None):
+    """
+    Runs one "step" of the simulation.
+    Now takes grid_width and grid_height as arguments.
+    If a ContentionHeatmap is given, attacks on other teams are recorded in it:
+    every pixel the attack took, or the defender's pixel if the defense held.
+    """
+    attacker_y, attacker_x = choose_random_pixel(grid_width, grid_height)
+    attacker = team_classes[grid[attacker_y, attacker_x]] # instance of attacker class
+    defender_y, defender_x = attacker.pick_defender(grid, attacker_y, attacker_x)
+    defender_team = grid[defender_y, defender_x]
+    if heatmap is None or defender_team == attacker.team_id:
+        attacker.attack(grid, attacker_y, attacker_x, team_classes[defender_team], defender_y, defender_x)
+        return
+
+    if isinstance(attacker, Berserker):
+        attacker._heatmap = heatmap # A won attack converts a cluster around the defender: the Berserker records each pixel it takes
+        result = attacker.attack(grid, attacker_y, attacker_x, team_classes[defender_team], defender_y, defender_x)
+        attacker._heatmap = None
+    else:
+        result = attacker.attack(grid, attacker_y, attacker_x, team_classes[defender_team], defender_y, defender_x)
+        if result == 1:
+            heatmap.record(defender_y * grid_width + defender_x, True)
+    if result == 0: # Defense held
+        heatmap.record(defender_y * grid_width + defender_x, False)
+
+    # attacker_team = grid[attacker_y, attacker_x]
+    # if attacker_team < 0:
+    #     return # dead pixel cannot attack
+    # attacker_class = team_classes[attacker_team]
+
+    # attack_range = 1
+    # if attacker_class == "Sniper" or attacker_class == "Mortar":
+    #     attack_range = 10
+    
+    # defender_x, defender_y = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=attack_range)
+    # defender_team = grid[defender_y, defender_x]
+
+    # if attacker_class == "Assassin" and defender_team == attacker_team:
+    #     # retry up to three times
+    #     for _ in range(3):
+    #         defender_y, defender_x = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=attack_range)
+    #         defender_team = grid[defender_y, defender_x]
+    #         if defender_team != attacker_team:
+    #             break
+
+    # attack(grid, grid_width, grid_height, attacker_y, attacker_x, defender_y, defender_x, team_classes, hitpoints)
+    
+
+
+@lru_cache(maxsize=None)
+def read_name_file(filepath):
+    """Reads the non-empty lines of a names file once; later calls reuse the result."""
+    with open(filepath, 'r') as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+def load_team_names(filepath, num_teams):
+    """
+    Loads a list of names from a file and randomly selects the required number.
+    Returns a fallback list (e.g., "Team 0") if file is missing or insufficient.
+    """
+    try:
+        all_names = read_name_file(filepath)
+        
+        if len(all_names) < num_teams:
+            print(f"Warning: Not enough names in {filepath} (found {len(all_names)}, need {num_teams}).")
+            raise ValueError("Not enough names")
+            
+        return random.sample(all_names, num_teams)
+        
+    except (IOError, ValueError):
+        print(f"Using generic names (e.g., 'Team 0').")
+        return [f"Team {i}" for i in range(num_teams)]
+
+@lru_cache(maxsize=None)
+def generate_distinct_colors(num_teams):
+    """
+    Generates a list of perceptually distinct colors using the
+    LCHab (Lightness, Chroma, Hue) color space.
+
+    All teams are converted at once with NumPy (LCHab -> Lab -> XYZ (D50) ->
+    Bradford adaptation to D65 -> sRGB), matching colormath's convert_color.
+    The result is cached per team count and read-only.
+    """
+    i = np.arange(num_teams)
+    hue = np.radians(i * (360.0 / num_teams))
+    lightness = np.where(i % 2 == 0, 70.0, 55.0)
+    chroma = 60.0
+
+    # LCHab -> Lab -> XYZ (D50)
+    fy = (lightness + 16.0) / 116.0
+    fx = chroma * np.cos(hue) / 500.0 + fy
+    fz = fy - chroma * np.sin(hue) / 200.0
+    f = np.stack([fx, fy, fz], axis=1)
+    xyz = np.where(f ** 3 > CIE_E, f ** 3, (f - 16.0 / 116.0) / 7.787) * D50_WHITE
+
+    # Bradford adaptation D50 -> D65, then XYZ -> linear sRGB
+    adaptation = np.linalg.inv(BRADFORD) @ np.diag((BRADFORD @ D65_WHITE) / (BRADFORD @ D50_WHITE)) @ BRADFORD
+    linear = xyz @ (XYZ_TO_SRGB @ adaptation).T
+
+    # sRGB companding, clamping and truncation to 0-255
+    with np.errstate(invalid='ignore'):
+        rgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    colors = (np.clip(rgb, 0.0, 1.0) * 255).astype(np.uint8)
+    colors.flags.writeable = False
+    return colors
+
+
+def create_team_classes(num_teams, level=logging.INFO, possible_classes=PLAYABLE_CLASSES, topology='torus'):
+    """Randomly assigns a class instance to every team. Returns {team_id: instance}."""
+    team_classes = {i: random.choice(possible_classes)(i, level=level) for i in range(num_teams)}
+    for instance in team_classes.values():
+        instance.topology = topology
+    return team_classes
+
+def reset_team_classes(team_classes, level=logging.INFO):
+    """Returns fresh instances of the same classes, clearing state such as Healer health (the topology is kept)."""
+    fresh = {i: type(instance)(i, level=level) for i, instance in team_classes.items()}
+    for i, instance in fresh.items():
+        instance.topology = team_classes[i].topology
+    return fresh
+
+def class_by_name(name):
+    """Looks up a playable Class subclass by its name (e.g. "Sniper")."""
+    for cls in PLAYABLE_CLASSES:
+        if cls.__name__ == name:
+            return cls
+    raise ValueError(f"Unknown class '{name}'. Choose from: {', '.join(c.__name__ for c in PLAYABLE_CLASSES)}")
+
+def make_team_class(name, team_id, params=None, level=logging.INFO):
+    """
+    Creates an instance of the named class and overrides its tuning attributes,
+    e.g. make_team_class("Sniper", 0, {"range": 12, "sneakiness": 0.5}).
+    """
+    instance = class_by_name(name)(team_id, level=level)
+    for attr, value in (params or {}).items():
+        if not hasattr(instance, attr) or attr in ('team_id', 'logger'):
+            raise ValueError(f"{name} has no tunable attribute '{attr}'")
+        kind = type(getattr(instance, attr))
+        if kind is int and not float(value).is_integer():
+            raise ValueError(f"{name}.{attr} takes whole numbers, got {value:g}") # int() would silently truncate it
+        setattr(instance, attr, kind(value)) # Keep ints (e.g. range) ints
+    return instance
+
+def count_teams(grid, num_teams):
+    """Returns the number of living pixels owned by each team."""
+    filtered_grid = grid[grid >= 0] # Exclude dead pixels
+    return np.bincount(filtered_grid.ravel(), minlength=num_teams)
+
+def run_frame(grid, team_classes, updates_per_frame, hitpoints=None, heatmap=None):
+    """Runs one frame worth of simulation steps, with no timing or drawing."""
+    grid_height, grid_width = grid.shape
+    for _ in range(updates_per_frame):
+        run_simulation(grid, grid_width, grid_height, team_classes, hitpoints, heatmap)
+    if heatmap is not None:
+        heatmap.flush()
+
+def build_palette(colors):
+    """Returns the team colors with DEAD_COLOR appended as the last palette entry."""
+    return np.vstack([colors, np.array([DEAD_COLOR], dtype=np.uint8)])
+
+def palette_indices(grid, num_teams, out=None):
+    """
+    Maps the grid to indices into build_palette(colors), so dead pixels point at
+    the DEAD_COLOR entry. Writes into 'out' if given to avoid reallocating.
+    """
+    if out is None:
+        out = np.empty(grid.shape, dtype=np.uint8 if num_teams < 256 else np.int32)
+    np.copyto(out, grid, casting='unsafe')
+    out[grid < 0] = num_teams
+    return out
+
+def get_class_states(team_classes):
+    """
+    Returns a plain, picklable/JSON-able description of every team's class:
+    a list of (class name, attribute dict) ordered by team id.
+    """
+    return [
+        (team_classes[i].get_name(), {k: v for k, v in vars(team_classes[i]).items() if k != 'logger' and not k.startswith('_')})
+        for i in range(len(team_classes))
+    ]
+
+def restore_team_classes(class_states, level=logging.INFO):
+    """Rebuilds {team_id: instance} from get_class_states() output, including state like Healer health."""
+    team_classes = {}
+    for i, (name, attrs) in enumerate(class_states):
+        team_classes[i] = class_by_name(name)(i, level=level)
+        for key, value in attrs.items():
+            setattr(team_classes[i], key, value)
+    return team_classes
+
+def save_snapshot(filename, grid, colors, team_names, team_classes, frame_count=0):
+    """Saves the current grid and class state so a game can be resumed or rendered later."""
+    class_states = get_class_states(team_classes)
+    np.savez_compressed(
+        filename,
+        grid=grid,
+        colors=colors,
+        names=team_names,
+        classes=[name for name, _ in class_states],
+        class_states=json.dumps([attrs for _, attrs in class_states]),
+        frame=frame_count
+    )
+
+def load_snapshot(filename, level=logging.INFO):
+    """
+    Loads a file written by save_snapshot.
+    Returns (grid, colors, team_names, team_classes, frame_count).
+    """
+    data = np.load(filename, allow_pickle=True)
+    grid = data['grid'].astype(np.int32)
+    class_attrs = json.loads(str(data['class_states']))
+    team_classes = restore_team_classes(
+        [(str(name), attrs) for name, attrs in zip(data['classes'], class_attrs)], level=level
+    )
+    return grid, data['colors'], [str(name) for name in data['names']], team_classes, int(data['frame'])
+
+def play_game(team_classes, grid_size, updates_per_frame=1000, max_frames=2000, seed=None, grid=None):
+    """
+    Plays one headless game as fast as possible.
+    Pass a preallocated 'grid' to reuse it across back-to-back games.
+    Returns (winner, frame_count, finished). If no team is left alone after
+    max_frames (a stand-still), the team with the most pixels is the winner
+    and finished is False.
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    grid = init_grid(grid_size, grid_size, len(team_classes), out=grid)
+    return continue_game(grid, team_classes, updates_per_frame, max_frames)
+
+def play_duel(entrant_a, entrant_b, grid_size, updates_per_frame=1000, max_frames=2000, seed=None):
+    """
+    Plays one headless 1v1 game between two (class_name, params) entrants.
+    Returns 1 if entrant_a won, else 0.
+    """
+    side = random.Random(seed).randint(0, 1) # Random team id, so neither entrant is always team 0
+    team_classes = {
+        side: make_team_class(entrant_a[0], side, entrant_a[1], level=logging.WARNING),
+        1 - side: make_team_class(entrant_b[0], 1 - side, entrant_b[1], level=logging.WARNING),
+    }
+    winner, _, _ = play_game(team_classes, grid_size, updates_per_frame, max_frames, seed=seed)
+    return int(winner == side)
+
+def stop_pool(pool):
+    """
+    Stops a ProcessPoolExecutor of games right away (on Ctrl+C). Queued games are
+    cancelled and the workers are terminated: games already handed to a worker
+    (up to workers + 1) cannot be cancelled and would otherwise all be played out.
+    """
+    if hasattr(pool, 'terminate_workers'): # Python 3.14+
+        pool.terminate_workers()
+        return
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+def continue_game(grid, team_classes, updates_per_frame=1000, max_frames=2000, sync_engine=None, fire=None, stop=None):
+    """
+    Plays an existing grid (modified in place) to the end, headless.
+    With a SyncEngine every frame is one generation instead of updates_per_frame
+    attacks, and a FireField is advanced once per frame, like in the game window.
+    'stop' is checked between frames; the game is abandoned once it returns True.
+    Returns (winner, frame_count, finished) like play_game.
+    """
+    num_teams = len(team_classes)
+    frame_count = 0
+    counts = count_teams(grid, num_teams)
+    while frame_count < max_frames and np.count_nonzero(counts) > 1:
+        if stop is not None and stop():
+            break
+        if sync_engine:
+            sync_engine.step(grid)
+        else:
+            run_frame(grid, team_classes, updates_per_frame)
+        if fire:
+            fire.update(grid, team_classes)
+        frame_count += 1
+        counts = count_teams(grid, num_teams)
+    return int(np.argmax(counts)), frame_count, bool(np.count_nonzero(counts) <= 1)
@@ -0,0 +1,256 @@
+"""
+Renders a Pixels Fighting game straight to an image sequence, animated GIF or a
+raw RGB frame stream (for ffmpeg) without opening a window or waiting on a clock.
+
+Frames are built palette-indexed (one byte per pixel, colors looked up as
+colors[grid]) so the only per-frame cost beyond the simulation is a copy.
+
+Examples:
+    python exporter.py -o results/game.gif -s 100 -t 8 -e 5
+    python exporter.py -i results/Game_snapshot_300.npz -o results/frames/
+    python exporter.py -o - -e 2 | ffmpeg -f rawvideo -pix_fmt rgb24 -s 400x400 -r 30 -i - game.mp4
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Must be set before pygame is imported
+import argparse
+import logging
+import random
+import sys
+import numpy as np
+
+from engine import (
+    init_grid, load_team_names, generate_distinct_colors, create_team_classes,
+    count_teams, run_frame, build_palette, palette_indices, load_snapshot
+)
+
+# --- Settings ---
+TEAM_NAMES_FILE = "team_names.txt"
+HISTORY_FRAME_HEIGHT = 40 # Height of the stacked share bar when rendering a results history
+
+
+def positive_int(value):
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def simulation_frames(grid, team_classes, updates_per_frame, every, max_frames):
+    """
+    Advances the game as fast as possible and yields palette indices of every
+    'every'-th simulation frame, plus the final frame once one team is left.
+    """
+    num_teams = len(team_classes)
+    indices = np.empty(grid.shape, dtype=np.uint8 if num_teams < 256 else np.int32)
+    yield palette_indices(grid, num_teams, out=indices)
+
+    frame_count = 0
+    while frame_count < max_frames:
+        run_frame(grid, team_classes, updates_per_frame)
+        frame_count += 1
+        finished = np.count_nonzero(count_teams(grid, num_teams)) <= 1
+        if frame_count % every == 0 or finished:
+            yield palette_indices(grid, num_teams, out=indices)
+        if finished:
+            break
+    print(f"Simulated {frame_count} frames.", file=sys.stderr)
+
+def history_frames(history, every, width):
+    """
+    Yields one stacked share bar per sampled row of a saved results history
+    (the 'history' array written by pixels-fighting.py).
+    """
+    num_teams = history.shape[1]
+    team_ids = np.arange(num_teams)
+    for row in history[::every]:
+        widths = np.round(row * width).astype(int)
+        widths[np.argmax(widths)] += width - widths.sum() # Absorb rounding error
+        bar = np.repeat(team_ids, np.maximum(widths, 0))
+        yield np.broadcast_to(bar, (HISTORY_FRAME_HEIGHT, width))
+
+
+class PngSequenceWriter:
+    """Writes frames as numbered 8-bit palette PNGs into a directory, using pygame."""
+    def __init__(self, directory, palette):
+        import pygame
+        self.pygame = pygame
+        self.directory = directory
+        self.palette = [tuple(int(c) for c in rgb) for rgb in palette]
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, indices):
+        height, width = indices.shape
+        surface = self.pygame.Surface((width, height), depth=8)
+        surface.set_palette(self.palette)
+        self.pygame.surfarray.blit_array(surface, indices.T)
+        self.pygame.image.save(surface, os.path.join(self.directory, f"frame_{self.count:06d}.png"))
+        self.count += 1
+
+    def close(self):
+        print(f"Wrote {self.count} PNG frames to '{self.directory}'", file=sys.stderr)
+
+
+class GifWriter:
+    """Collects palette-indexed frames and saves them as one animated GIF (requires Pillow)."""
+    def __init__(self, filename, palette, fps):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise SystemExit("Error: GIF export requires Pillow (pip install Pillow). PNG and raw output do not.")
+        self.Image = Image
+        self.filename = filename
+        self.palette = palette.astype(np.uint8).ravel().tolist()
+        self.duration = int(1000 / fps)
+        self.frames = []
+
+    def write(self, indices):
+        image = self.Image.fromarray(np.array(indices, dtype=np.uint8), mode='P') # Copy: indices buffers are reused
+        image.putpalette(self.palette)
+        self.frames.append(image)
+
+    def close(self):
+        if not self.frames:
+            return
+        self.frames[0].save(
+            self.filename, save_all=True, append_images=self.frames[1:],
+            duration=self.duration, loop=0, optimize=False
+        )
+        print(f"Wrote {len(self.frames)} frames to '{self.filename}'", file=sys.stderr)
+
+
+class RawWriter:
+    """Streams frames as raw rgb24 bytes to a file or stdout ('-'), ready to pipe into ffmpeg."""
+    def __init__(self, filename, palette):
+        self.palette = palette
+        self.stream = sys.stdout.buffer if filename == '-' else open(filename, 'wb')
+        self.count = 0
+        self.shape = None
+
+    def write(self, indices):
+        self.shape = indices.shape
+        self.stream.write(self.palette[indices].tobytes())
+        self.count += 1
+
+    def close(self):
+        self.stream.flush()
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+        if self.shape is not None:
+            height, width = self.shape
+            print(f"Wrote {self.count} raw frames ({width}x{height}, rgb24)", file=sys.stderr)
+
+
+def make_writer(output, palette, fps):
+    """Picks a writer from the output path: '.gif', '-'/'.rgb'/'.raw', or a directory for PNGs."""
+    if output.endswith('.gif'):
+        if len(palette) > 256:
+            raise SystemExit("Error: GIF export supports at most 255 teams.")
+        return GifWriter(output, palette, fps)
+    if output == '-' or output.endswith('.rgb') or output.endswith('.raw'):
+        return RawWriter(output, palette)
+    if len(palette) > 256:
+        raise SystemExit("Error: PNG export supports at most 255 teams. Use raw output instead.")
+    return PngSequenceWriter(output, palette)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Pixels Fighting game to frames without a display.")
+    parser.add_argument(
+        '-o', '--output',
+        type=str,
+        required=True,
+        help='Output: a .gif file, a directory for a PNG sequence, or "-"/.rgb/.raw for a raw rgb24 stream.'
+    )
+    parser.add_argument(
+        '-i', '--input',
+        type=str,
+        default=None,
+        help='Optional .npz to start from: a snapshot (S key in game) is continued, a results file renders its history. Default: new game'
+    )
+    parser.add_argument(
+        '-s', '--grid_size',
+        type=int,
+        default=100,
+        help='Side length of the square grid for a new game. Default: 100'
+    )
+    parser.add_argument(
+        '-t', '--num_teams',
+        type=int,
+        default=8,
+        help='Number of competing teams for a new game. Default: 8'
+    )
+    parser.add_argument(
+        '-u', '--updates_per_frame',
+        type=int,
+        default=1000,
+        help='Number of pixel "fights" per simulation frame. Default: 1000'
+    )
+    parser.add_argument(
+        '-e', '--every',
+        type=positive_int,
+        default=1,
+        help='Write one output frame per N simulation frames. Default: 1'
+    )
+    parser.add_argument(
+        '-n', '--max_frames',
+        type=positive_int,
+        default=2000,
+        help='Stop after this many simulation frames even if nobody has won (stand-stills never end). Default: 2000'
+    )
+    parser.add_argument(
+        '-z', '--scale',
+        type=int,
+        default=1,
+        help='Integer upscaling factor applied to each output frame. Default: 1'
+    )
+    parser.add_argument(
+        '--fps',
+        type=int,
+        default=30,
+        help='Playback frame rate stored in GIF output. Default: 30'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed for a reproducible export. Default: none'
+    )
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+
+    # --- Pick the frame source ---
+    data = np.load(args.input, allow_pickle=True) if args.input else None
+    if data is not None and 'grid' in data:
+        grid, colors, team_names, team_classes, start_frame = load_snapshot(args.input)
+        print(f"Continuing snapshot from frame {start_frame} ({grid.shape[1]}x{grid.shape[0]}, {len(team_classes)} teams)", file=sys.stderr)
+        frames = simulation_frames(grid, team_classes, args.updates_per_frame, args.every, args.max_frames)
+    elif data is not None:
+        history = data['history']
+        colors = data['colors'] if 'colors' in data else generate_distinct_colors(history.shape[1])
+        print(f"Rendering saved history with {len(history)} frames", file=sys.stderr)
+        frames = history_frames(history, args.every, args.grid_size)
+    else:
+        grid = init_grid(args.grid_size, args.grid_size, args.num_teams)
+        colors = generate_distinct_colors(args.num_teams)
+        team_names = load_team_names(TEAM_NAMES_FILE, args.num_teams)
+        team_classes = create_team_classes(args.num_teams, level=logging.WARNING)
+        print("Teams: " + ", ".join(f"{team_names[i]} ({team_classes[i].get_name()})" for i in team_classes), file=sys.stderr)
+        frames = simulation_frames(grid, team_classes, args.updates_per_frame, args.every, args.max_frames)
+
+    # --- Write frames ---
+    writer = make_writer(args.output, build_palette(colors), args.fps)
+    try:
+        for indices in frames:
+            if args.scale > 1:
+                indices = indices.repeat(args.scale, axis=0).repeat(args.scale, axis=1)
+            writer.write(indices)
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Fire: an optional hazard field that lives next to the team grid and breaks up stand-stills.
+
+Every pixel is either unburnt (0), burning (frames of fire left, > 0) or ash
+(frames until it can burn again, < 0). Once per frame the whole field advances
+with a few vectorized lookups in the grid's neighbor table (topology.py):
+    spark    random sparks land on the map; one ignites a pixel only on a front
+             (a pixel with a neighbor of another team), so fires start where the
+             fighting is, including in frozen stand-stills
+    spread   an unburnt pixel catches fire from each burning edge neighbor (4 on
+             square grids, 6 on hex) with 'spread_chance', unless its team resists
+    burn     when the fire on a pixel burns out, the pixel may be lost to the
+             team of a random pixel around it, then it turns to ash for a while
+Teams react to fire through their Class attributes fire_ignition (spark
+multiplier), fire_resistance and fire_damage. Only sparks, burning pixels and
+their neighbors are looked up, so the cost per frame is a few passes over the
+int8 field plus work proportional to the fire, independent of how many attacks
+a frame runs.
+"""
+
+import numpy as np
+
+from topology import get_topology
+
+FIRE_COLORS = np.array([[255, 60, 0], [255, 220, 60]], dtype=np.float64) # Dying -> fresh fire
+ASH_COLOR = np.array([50, 50, 50], dtype=np.float64)
+MAX_FRAMES = np.iinfo(np.int8).max # Longest burn or ash duration the int8 field can count down
+
+
+class FireField:
+    def __init__(self, grid_shape, spark_chance=1e-4, spread_chance=0.08, burn_frames=8, ash_frames=40, seed=None, topology='torus'):
+        """
+        spark_chance: chance per pixel and frame that a spark lands on it.
+        spread_chance: chance per frame that fire jumps from a burning pixel to an edge neighbor.
+        burn_frames / ash_frames: how long a pixel burns, then stays burnt out (1..127 frames, the field is int8).
+        topology: grid topology name, the same as the teams play on.
+        """
+        for name, frames in (('burn_frames', burn_frames), ('ash_frames', ash_frames)):
+            if not 1 <= frames <= MAX_FRAMES:
+                raise ValueError(f"{name} must be between 1 and {MAX_FRAMES}, got {frames}")
+        self.H, self.W = grid_shape
+        self.spark_chance = spark_chance
+        self.spread_chance = spread_chance
+        self.burn_frames = burn_frames
+        self.ash_frames = ash_frames
+        self.rng = np.random.default_rng(seed)
+
+        self.fire = np.zeros(grid_shape, dtype=np.int8)
+        self.topology = get_topology(topology, tuple(grid_shape))
+        self.neighbor_table = self.topology.neighbor_table(1)
+        self.edge_columns = np.array(self.topology.edge_columns)
+        # Chance to catch fire with 0..4 (hex: 0..6) burning edge neighbors
+        self.catch_chance = 1 - (1 - spread_chance) ** np.arange(len(self.edge_columns) + 1)
+
+    def clear(self):
+        self.fire.fill(0)
+
+    def update(self, grid, team_classes):
+        """Advances the fire by one frame. 'grid' may lose burnt pixels to neighboring teams (modified in place)."""
+        num_teams = len(team_classes)
+        ignition = np.array([team_classes[i].fire_ignition for i in range(num_teams)], dtype=np.float64)
+        resistance = np.array([team_classes[i].fire_resistance for i in range(num_teams)], dtype=np.float64)
+        damage = np.array([team_classes[i].fire_damage for i in range(num_teams)], dtype=np.float64)
+        fire = self.fire.reshape(-1)
+        teams = grid.reshape(-1)
+
+        # --- burn: count down burning pixels, burnt out ones may be lost, then become ash ---
+        burning_idx = np.flatnonzero(fire > 0)
+        fire[burning_idx] -= 1
+        burnt_out = burning_idx[fire[burning_idx] == 0]
+        if len(burnt_out):
+            lost = burnt_out[self.rng.random(len(burnt_out)) < damage[teams[burnt_out]]]
+            if len(lost):
+                taker = self.neighbor_table[lost, self.rng.integers(0, self.topology.K, size=len(lost))]
+                teams[lost] = teams[np.where(taker >= 0, taker, lost)]
+            fire[burnt_out] = -self.ash_frames
+        ash_idx = np.flatnonzero(fire < 0)
+        fire[ash_idx] += 1
+
+        # --- spread: count burning edge neighbors around every burning pixel ---
+        burning_idx = np.flatnonzero(fire > 0)
+        if len(burning_idx):
+            near = self.neighbor_table[burning_idx[:, None], self.edge_columns].ravel()
+            burning_neighbors = np.bincount(near[near >= 0], minlength=fire.size)
+            exposed = np.flatnonzero(burning_neighbors)
+            exposed = exposed[fire[exposed] == 0] # Usually a thin ring around each fire
+            chance = self.catch_chance[burning_neighbors[exposed]] * (1 - resistance[teams[exposed]])
+            fire[exposed[self.rng.random(len(exposed)) < chance]] = self.burn_frames
+
+        # --- spark: only pixels on a front between two teams ignite ---
+        max_ignition = ignition.max(initial=0.0)
+        num_sparks = self.rng.binomial(self.H * self.W, min(1.0, self.spark_chance * max_ignition))
+        if num_sparks:
+            spots = self.rng.integers(0, self.H * self.W, size=num_sparks)
+            spots = spots[(fire[spots] == 0) & (self.rng.random(num_sparks) * max_ignition < ignition[teams[spots]])]
+            near = self.neighbor_table[spots[:, None], self.edge_columns]
+            on_front = ((near >= 0) & (teams[near] != teams[spots][:, None])).any(axis=1)
+            fire[spots[on_front]] = self.burn_frames
+
+    def blend(self, color_array, max_alpha=0.9):
+        """Draws burning pixels (fresh fire is brighter) and ash over an (x, y, 3) uint8 color array in place."""
+        view = color_array.transpose(1, 0, 2) # (y, x) like the field
+        burning = self.fire > 0
+        if burning.any():
+            level = (self.fire[burning] / self.burn_frames)[:, None]
+            fire_color = FIRE_COLORS[0] * (1 - level) + FIRE_COLORS[1] * level
+            view[burning] = view[burning] * (1 - max_alpha) + fire_color * max_alpha
+        ash = self.fire < 0
+        if ash.any():
+            fade = (-self.fire[ash] / self.ash_frames)[:, None] * 0.6 # Ash fades as it cools
+            view[ash] = view[ash] * (1 - fade) + ASH_COLOR * fade
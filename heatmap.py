@@ -0,0 +1,71 @@
+"""
+Per-pixel contention heatmap: where pixels change hands and where attacks are held off.
+
+Recording is batched: run_simulation() only appends the flat index of each
+contested pixel to a Python list, and flush() adds the whole frame's worth to
+the count arrays with one np.add.at per kind. No logging is involved. It still
+costs time per attack, so the game only records while the overlay is shown,
+or for the whole game with --heatmap.
+"""
+
+import numpy as np
+
+# Overlay color ramp, from low to high contention (dark red -> orange -> yellow)
+HEAT_COLORS = np.array([[120, 0, 0], [255, 120, 0], [255, 255, 80]], dtype=np.float64)
+
+
+class ContentionHeatmap:
+    def __init__(self, grid_shape):
+        self.shape = grid_shape
+        self.captures = np.zeros(grid_shape[0] * grid_shape[1], dtype=np.int64) # Pixel changed owner
+        self.holds = np.zeros(grid_shape[0] * grid_shape[1], dtype=np.int64) # Defense held, no capture
+        self.pending_captures = []
+        self.pending_holds = []
+
+    def record(self, flat_index, captured):
+        """Buffers one attack on another team's pixel. Called from run_simulation()."""
+        if captured:
+            self.pending_captures.append(flat_index)
+        else:
+            self.pending_holds.append(flat_index)
+
+    def flush(self):
+        """Adds the buffered events to the counts. Call once per frame."""
+        if self.pending_captures:
+            np.add.at(self.captures, np.array(self.pending_captures, dtype=np.intp), 1)
+            self.pending_captures.clear()
+        if self.pending_holds:
+            np.add.at(self.holds, np.array(self.pending_holds, dtype=np.intp), 1)
+            self.pending_holds.clear()
+
+    def add(self, captured_indices, held_indices):
+        """Adds already-vectorized events (flat index arrays), e.g. from the sync engine."""
+        np.add.at(self.captures, captured_indices, 1)
+        np.add.at(self.holds, held_indices, 1)
+
+    def clear(self):
+        self.captures.fill(0)
+        self.holds.fill(0)
+        self.pending_captures.clear()
+        self.pending_holds.clear()
+
+    def as_grid(self):
+        """Counts as a (2, height, width) array: [captures, holds]."""
+        return np.stack([self.captures, self.holds]).reshape(2, *self.shape)
+
+    def blend(self, color_array, max_alpha=0.85):
+        """
+        Blends the heatmap over an (x, y, 3) uint8 color array in place.
+        Intensity is log-scaled so a few very busy pixels don't wash out the rest.
+        """
+        heat = np.log1p(self.captures + self.holds).reshape(self.shape).T # (x, y) like the surface array
+        peak = heat.max()
+        if peak == 0:
+            return
+        level = heat / peak
+        ramp = np.clip(level * (len(HEAT_COLORS) - 1), 0, len(HEAT_COLORS) - 1 - 1e-9)
+        low = ramp.astype(np.intp)
+        frac = (ramp - low)[..., None]
+        heat_color = HEAT_COLORS[low] * (1 - frac) + HEAT_COLORS[low + 1] * frac
+        alpha = (level * max_alpha)[..., None]
+        color_array[...] = color_array * (1 - alpha) + heat_color * alpha
@@ -0,0 +1,180 @@
+"""
+Sidebar leaderboard that stays fast and readable with hundreds of teams.
+
+Teams are ranked with a partial sort (argpartition) that only orders the rows
+on screen. If every team fits, each gets a row as before; otherwise the
+leaderboard shows a scrollable window of the ranking (mouse wheel or Up/Down
+keys) plus a summary row for the teams that are not shown.
+
+Rows are drawn once into a persistent surface and only redrawn when their
+content changes, and every text surface comes from a cache keyed by its text
+and color, so a frame where nothing moved costs a single blit.
+"""
+
+import numpy as np
+import pygame
+
+MIN_ROW_HEIGHT = 40 # Smallest row that still fits an eliminated team's three lines of text
+BACKGROUND_COLOR = (0, 0, 0)
+BAR_BACKGROUND_COLOR = (40, 40, 40)
+SUMMARY_COLOR = (70, 70, 70)
+BAR_PADDING = 2
+
+
+class TextCache:
+    def __init__(self, font, max_entries=4096):
+        self.font = font
+        self.max_entries = max_entries
+        self.surfaces = {}
+
+    def render(self, text, color):
+        """Same as font.render(text, True, color), but each (text, color) is only rendered once."""
+        key = (text, tuple(color))
+        surf = self.surfaces.get(key)
+        if surf is None:
+            if len(self.surfaces) >= self.max_entries:
+                self.surfaces.clear() # Percent strings come and go; start over rather than grow forever
+            surf = self.surfaces[key] = self.font.render(text, True, color)
+        return surf
+
+
+def rank_teams(counts, team_active, elimination_order, stop):
+    """
+    Team indices for leaderboard places 0..stop-1: active teams by pixel count
+    (ties by team index), then eliminated teams, latest elimination first.
+    Only the teams that make it onto the list are sorted.
+    """
+    alive = np.flatnonzero(team_active)
+    key = counts[alive].astype(np.int64) * len(counts) - alive # Unique: more pixels first, then lower index
+    if stop < len(alive):
+        top = np.argpartition(-key, stop - 1)[:stop] # No ties at the cutoff, so every 'stop' agrees
+        alive, key = alive[top], key[top]
+    ranked = alive[np.argsort(-key)]
+    if len(ranked) < stop:
+        eliminated = np.array(elimination_order[::-1][:stop - len(ranked)], dtype=ranked.dtype)
+        ranked = np.concatenate([ranked, eliminated])
+    return ranked
+
+
+class Leaderboard:
+    def __init__(self, rect, font, num_teams, total_pixels,
+                 text_color=(255, 255, 255), elim_text_color=(0, 0, 0)):
+        """
+        rect: (x, y, width, height) of the bar area on the screen.
+        font: font for all leaderboard text.
+        """
+        self.rect = pygame.Rect(rect)
+        self.num_teams = num_teams
+        self.total_pixels = total_pixels
+        self.text = TextCache(font)
+        self.text_color = text_color
+        self.elim_text_color = elim_text_color
+
+        # --- Layout: one row per team if they fit, else a scrolling window plus a summary row ---
+        fitting_rows = max(2, self.rect.height // MIN_ROW_HEIGHT)
+        if num_teams <= fitting_rows:
+            self.visible_rows = num_teams
+            self.has_summary = False
+        else:
+            self.visible_rows = fitting_rows - 1
+            self.has_summary = True
+        self.row_height = self.rect.height / (self.visible_rows + self.has_summary)
+        self.offset = 0 # First leaderboard place shown
+
+        self.surface = pygame.Surface(self.rect.size)
+        self.surface.fill(BACKGROUND_COLOR)
+        self.labels = []
+        self.colors = []
+        self.row_keys = [None] * (self.visible_rows + self.has_summary)
+
+    def set_teams(self, team_names, team_classes, colors):
+        """Sets the per-game labels and colors (at the start and after every reset)."""
+        self.labels = [f"{team_names[i]} ({team_classes[i].get_name()})" for i in range(self.num_teams)]
+        self.colors = [tuple(int(c) for c in color) for color in colors]
+        self.offset = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Forces every row to be redrawn on the next draw()."""
+        self.row_keys = [None] * len(self.row_keys)
+
+    def scroll(self, rows):
+        """Moves the visible window by 'rows' places (negative is up). Does nothing if every team fits."""
+        max_offset = self.num_teams - self.visible_rows
+        self.offset = min(max(self.offset + rows, 0), max_offset)
+
+    def draw(self, screen, counts, team_active, elimination_order, elimination_times, win_probabilities=None):
+        """Redraws the rows whose content changed and blits the leaderboard to the screen."""
+        ranked = rank_teams(counts, team_active, elimination_order, self.offset + self.visible_rows)
+        shown = ranked[self.offset:]
+        bar_width = self.rect.width - 4
+
+        for slot, i in enumerate(shown):
+            if team_active[i]:
+                percent = counts[i] / self.total_pixels
+                odds = f"Win {win_probabilities[i] * 100:.0f}%" if win_probabilities is not None else None
+                key = (i, int(percent * bar_width), f"{percent * 100:.1f}%", odds)
+            else:
+                key = (i, elimination_times[i])
+            if key != self.row_keys[slot]:
+                self.row_keys[slot] = key
+                self._draw_team_row(slot, key, bool(team_active[i]))
+
+        if self.has_summary:
+            slot = self.visible_rows
+            others = self.total_pixels - int(counts[shown].sum())
+            key = (
+                f"#{self.offset + 1}-{self.offset + len(shown)} of {self.num_teams}",
+                f"Rest: {others / self.total_pixels * 100:.1f}%",
+                f"{int(np.count_nonzero(team_active))} alive",
+            )
+            if key != self.row_keys[slot]:
+                self.row_keys[slot] = key
+                self._draw_summary_row(slot, key)
+
+        screen.blit(self.surface, self.rect)
+
+    # --- Row drawing (into self.surface, local coordinates) ---
+    def _row_rect(self, slot):
+        top = int(slot * self.row_height)
+        bottom = int((slot + 1) * self.row_height) - BAR_PADDING
+        return pygame.Rect(2, top, self.rect.width - 4, bottom - top)
+
+    def _draw_team_row(self, slot, key, active):
+        i = key[0]
+        bg_bar_rect = self._row_rect(slot)
+        self.surface.fill(BACKGROUND_COLOR, (0, bg_bar_rect.top, self.rect.width, bg_bar_rect.height + BAR_PADDING))
+
+        if active:
+            _, filled_width, percent_string, odds_string = key
+            pygame.draw.rect(self.surface, BAR_BACKGROUND_COLOR, bg_bar_rect)
+            pygame.draw.rect(self.surface, self.colors[i], (bg_bar_rect.left, bg_bar_rect.top, filled_width, bg_bar_rect.height))
+
+            name_surf = self.text.render(self.labels[i], self.text_color)
+            self.surface.blit(name_surf, name_surf.get_rect(centery=bg_bar_rect.centery - 7, left=bg_bar_rect.left + 5))
+
+            percent_surf = self.text.render(percent_string, self.text_color)
+            self.surface.blit(percent_surf, percent_surf.get_rect(centery=bg_bar_rect.centery + 7, right=bg_bar_rect.right - 5))
+
+            if odds_string is not None:
+                odds_surf = self.text.render(odds_string, self.text_color)
+                self.surface.blit(odds_surf, odds_surf.get_rect(centery=bg_bar_rect.centery + 7, left=bg_bar_rect.left + 5))
+        else:
+            elim_time_str, elim_max_str = key[1]
+            pygame.draw.rect(self.surface, self.colors[i], bg_bar_rect)
+            for line, dy in ((self.labels[i], -10), (elim_time_str, 2), (elim_max_str, 14)):
+                surf = self.text.render(line, self.elim_text_color)
+                self.surface.blit(surf, surf.get_rect(center=(bg_bar_rect.centerx, bg_bar_rect.centery + dy)))
+
+    def _draw_summary_row(self, slot, key):
+        places, others, alive = key
+        bg_bar_rect = self._row_rect(slot)
+        self.surface.fill(BACKGROUND_COLOR, (0, bg_bar_rect.top, self.rect.width, bg_bar_rect.height + BAR_PADDING))
+        pygame.draw.rect(self.surface, SUMMARY_COLOR, bg_bar_rect)
+
+        places_surf = self.text.render(places, self.text_color)
+        self.surface.blit(places_surf, places_surf.get_rect(centery=bg_bar_rect.centery - 7, left=bg_bar_rect.left + 5))
+        others_surf = self.text.render(others, self.text_color)
+        self.surface.blit(others_surf, others_surf.get_rect(centery=bg_bar_rect.centery + 7, left=bg_bar_rect.left + 5))
+        alive_surf = self.text.render(alive, self.text_color)
+        self.surface.blit(alive_surf, alive_surf.get_rect(centery=bg_bar_rect.centery + 7, right=bg_bar_rect.right - 5))
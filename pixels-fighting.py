@@ -1,172 +1,27 @@
+import time
+STARTUP_START = time.perf_counter() # Measured before the heavy imports below
+
 import pygame
 import numpy as np
-import random
-import colorsys
 import argparse
 import datetime
 import os
 import logging
-from colormath.color_objects import sRGBColor, LCHabColor
-from colormath.color_conversions import convert_color
 
-from classes import * # Importing classes module
+from engine import (
+    init_grid, run_simulation, load_team_names, generate_distinct_colors,
+    create_team_classes, reset_team_classes, count_teams, save_snapshot,
+    build_palette, palette_indices
+)
+from topology import TOPOLOGIES
+from heatmap import ContentionHeatmap
+from leaderboard import Leaderboard
+# Optional features (sync mode, fire, live stats, win odds, shared memory) are imported where they are turned on
 
 # --- Settings ---
 RESULTS_DIR = "results"
 TEAM_NAMES_FILE = "team_names.txt"
-
-def init_grid(width, height, num_teams):
-    """Creates a new grid with random team assignments."""
-    return np.random.randint(0, num_teams, size=(height, width), dtype=np.int32)
-
-def choose_random_pixel(grid_width, grid_height):
-    """Chooses a random pixel coordinate within the grid."""
-    y = random.randint(0, grid_height - 1)
-    x = random.randint(0, grid_width - 1)
-    return y, x
-
-def choose_random_nearby_pixel(y, x, grid_width, grid_height, range=1):
-    """Chooses a random adjacent pixel coordinate, wrapping around edges."""
-    dy = random.choice([-range, 0, range])
-    dx = random.choice([-range, 0, range])
-    new_y = (y + dy) % grid_height
-    new_x = (x + dx) % grid_width
-    return new_y, new_x
-
-def attack(grid, grid_width, grid_height, attacker_y, attacker_x, defender_y, defender_x, team_classes, hitpoints):
-    """
-    Executes an attack from attacker to defender.
-    """
-    attacker_team = grid[attacker_y, attacker_x]
-    if attacker_team < 0:
-        return # dead pixel cannot attack
-    attacker_class = team_classes[attacker_team]
-    defender_team = grid[defender_y, defender_x]
-    if defender_team < 0:
-        grid[attacker_y, attacker_x] = defender_team # attacker becomes dead necromancer
-        grid[defender_y, defender_x] = -1*defender_team # dead necromancer comes alive
-        return
-    defender_class = team_classes[defender_team]
-
-    if defender_team == attacker_team:
-        if attacker_class == "Healer":
-            hitpoints[attacker_team] += 1 # Healer heals its collective
-        if attacker_class != "Plague":
-            return
-    
-    # --- Defensive mechanics apply first ---
-    
-    if defender_class == "Healer":
-        if hitpoints[defender_team] > 0:
-            hitpoints[defender_team] -= 1 # Healer uses hitpoint to survive
-            return
-    
-    if defender_class == "Bunker":
-        if random.random() < 0.5:
-            return # 50% chance to block attack
-    
-    if defender_class == "Thorns":
-        if random.random() < 0.3:
-            grid[attacker_y, attacker_x] = defender_team # Reflect attack
-            return
-    
-    if defender_class == "Phalanx":
-        # count adjacent allies
-        ally_count = 0
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dy == 0 and dx == 0:
-                    continue
-                ny = (defender_y + dy) % grid_height
-                nx = (defender_x + dx) % grid_width
-                if grid[ny, nx] == defender_team:
-                    ally_count += 1
-        if ally_count >= 4:
-            return # Phalanx defended successfully
-    
-    if defender_class == "Sniper":
-        if random.random() < 0.4: # Sniper is sneaky
-            return
-        
-    # --- Attacker mechanics apply second ---
-        
-    if attacker_class == "Berserker":
-        # attack converts cluster of pixels
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                ny = (defender_y + dy) % grid_height
-                nx = (defender_x + dx) % grid_width
-                if grid[ny, nx] == defender_team:
-                    # random chance of taking over neighboring allies of defender
-                    if random.random() < 0.3:
-                        grid[ny, nx] = attacker_team
-        return
-    
-    if attacker_class == "Mortar":
-        # attack affects a 3x3 area
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if random.random() < 0.3: # chance to convert each pixel in area
-                    ny = (defender_y + dy) % grid_height
-                    nx = (defender_x + dx) % grid_width
-                    grid[ny, nx] = attacker_team
-        return
-    
-    if attacker_class == "Plague":
-        # newly converted pixels have a chance to convert neighbors
-        grid[defender_y, defender_x] = attacker_team
-        if random.random() < 0.5:
-            attack(grid, grid_width, grid_height, defender_y, defender_x, *choose_random_nearby_pixel(defender_y, defender_x, grid_width, grid_height, range=1), team_classes, hitpoints)
-    
-    if attacker_class == "Nomad":
-        # swap places up to 7 spaces away before attacking, and immune to defense
-        swap_y, swap_x = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=7)
-        grid[attacker_y, attacker_x], grid[swap_y, swap_x] = grid[swap_y, swap_x], grid[attacker_y, attacker_x]
-        grid[choose_random_nearby_pixel(swap_y, swap_x, grid_width, grid_height, range=1)] = attacker_team
-        return
-    
-    if attacker_class == "Necromancer":
-        # converts defender into a dead gray pixel, which doesn't do anything until attacked, when it turns into a necromancer pixel
-        grid[defender_y, defender_x] = -1 * attacker_team # dead pixel
-        return
-
-    # Default attack
-    grid[defender_y, defender_x] = attacker_team
-
-
-def run_simulation(grid, grid_width, grid_height, team_classes, hitpoints):
-    """
-    Runs one "step" of the simulation.
-    Now takes grid_width and grid_height as arguments.
-    """
-    attacker_y, attacker_x = choose_random_pixel(grid_width, grid_height)
-    attacker = team_classes[grid[attacker_y, attacker_x]] # instance of attacker class
-    defender_y, defender_x = attacker.pick_defender(grid, attacker_y, attacker_x)
-    attacker.attack(grid, attacker_y, attacker_x, team_classes[grid[defender_y, defender_x]], defender_y, defender_x)
-
-    # attacker_team = grid[attacker_y, attacker_x]
-    # if attacker_team < 0:
-    #     return # dead pixel cannot attack
-    # attacker_class = team_classes[attacker_team]
-
-    # attack_range = 1
-    # if attacker_class == "Sniper" or attacker_class == "Mortar":
-    #     attack_range = 10
-    
-    # defender_x, defender_y = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=attack_range)
-    # defender_team = grid[defender_y, defender_x]
-
-    # if attacker_class == "Assassin" and defender_team == attacker_team:
-    #     # retry up to three times
-    #     for _ in range(3):
-    #         defender_y, defender_x = choose_random_nearby_pixel(attacker_y, attacker_x, grid_width, grid_height, range=attack_range)
-    #         defender_team = grid[defender_y, defender_x]
-    #         if defender_team != attacker_team:
-    #             break
-
-    # attack(grid, grid_width, grid_height, attacker_y, attacker_x, defender_y, defender_x, team_classes, hitpoints)
-    
-
+WIN_ODDS_REFRESH_FRAMES = 60 # Minimum frames between two win odds estimates
 
 def format_time(milliseconds):
     """Converts milliseconds to a HH:MM:SS string."""
@@ -175,53 +30,16 @@ def format_time(milliseconds):
     hours, minutes = divmod(minutes, 60)
     return f"{hours:02}:{minutes:02}:{seconds:02}"
 
-def load_team_names(filepath, num_teams):
-    """
-    Loads a list of names from a file and randomly selects the required number.
-    Returns a fallback list (e.g., "Team 0") if file is missing or insufficient.
-    """
-    try:
-        with open(filepath, 'r') as f:
-            all_names = [line.strip() for line in f if line.strip()]
-        
-        if len(all_names) < num_teams:
-            print(f"Warning: Not enough names in {filepath} (found {len(all_names)}, need {num_teams}).")
-            raise ValueError("Not enough names")
-            
-        return random.sample(all_names, num_teams)
-        
-    except (IOError, ValueError):
-        print(f"Using generic names (e.g., 'Team 0').")
-        return [f"Team {i}" for i in range(num_teams)]
-
-def generate_distinct_colors(num_teams):
-    """
-    Generates a list of perceptually distinct colors using the
-    LCHab (Lightness, Chroma, Hue) color space.
-    """
-    colors_rgb_list = []
-    
-    for i in range(num_teams):
-        hue = i * (360.0 / num_teams)
-        lightness = 70.0 if i % 2 == 0 else 55.0
-        chroma = 60.0
-        lch_color = LCHabColor(lightness, chroma, hue)
-        rgb_color = convert_color(lch_color, sRGBColor)
-        
-        r_clamped = rgb_color.clamped_rgb_r
-        g_clamped = rgb_color.clamped_rgb_g
-        b_clamped = rgb_color.clamped_rgb_b
-        
-        r_int = int(r_clamped * 255)
-        g_int = int(g_clamped * 255)
-        b_int = int(b_clamped * 255)
-        
-        colors_rgb_list.append((r_int, g_int, b_int))
-    
-    return np.array(colors_rgb_list, dtype=np.uint8)
-
+def stats_setup(game_title, team_names, team_classes, colors):
+    """Per-game information for live stats clients (sent on connect and after resets)."""
+    return {
+        "title": game_title,
+        "names": list(team_names),
+        "classes": [team_classes[i].get_name() for i in range(len(team_classes))],
+        "colors": colors.tolist(),
+    }
 
-def pause_game(screen, clock, pause_font, sim_width, sim_height):
+def pause_game(screen, pause_font, sim_width, sim_height):
     """
     Pauses the game, freezes the screen, and waits for unpause or quit.
     This function takes over the game loop until it returns.
@@ -242,19 +60,18 @@ def pause_game(screen, clock, pause_font, sim_width, sim_height):
     pygame.display.flip()
     
     # 3. Enter the blocking pause loop
-    # This loop does NO drawing and NO logic, only event checking.
+    # This loop does NO drawing and NO logic, it sleeps until the next event.
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            return 'quit'
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_p:
+                return 'unpause' # Exit the pause loop
+            if event.key == pygame.K_q:
                 return 'quit'
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_p:
-                    return 'unpause' # Exit the pause loop
-                if event.key == pygame.K_q:
-                    return 'quit'
-        
-        # 4. Tick the clock to stay responsive without eating CPU
-        clock.tick(30) # No need to run at 60 FPS while paused
+        if event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+            pygame.display.flip() # The screen surface still holds the paused frame
 
 
 def main():
@@ -303,7 +120,61 @@ def main():
         default='INFO',
         help='Logging level (e.g., DEBUG, INFO, WARNING, ERROR). Default: INFO'
     )
+    parser.add_argument(
+        '-sp', '--stats_port',
+        type=int,
+        default=None,
+        help='Publish live stats as Server-Sent Events on this localhost port (see stats_server.py). Default: off'
+    )
+    parser.add_argument(
+        '-wo', '--win_odds',
+        type=int,
+        default=0,
+        help='Show each team\'s chance of winning, estimated from this many background rollouts (e.g. 32). Default: 0 (off)'
+    )
+    parser.add_argument(
+        '-m', '--update_mode',
+        type=str,
+        choices=['async', 'sync'],
+        default='async',
+        help='async: random single attacks (-u per frame). sync: every pixel attacks once per frame. Default: async'
+    )
+    parser.add_argument(
+        '--priority',
+        type=str,
+        choices=['random', 'index'],
+        default='random',
+        help='How sync mode resolves several attackers claiming the same pixel. Default: random'
+    )
+    parser.add_argument(
+        '-tp', '--topology',
+        type=str,
+        choices=TOPOLOGIES,
+        default='torus',
+        help='Map shape: torus (edges wrap around), walls (edges are walls) or hex (hexagonal neighbors, even -s only). Default: torus'
+    )
+    parser.add_argument(
+        '-fi', '--fire',
+        type=float,
+        default=0.0,
+        help='Turn on fires: chance per pixel and frame that a spark lands (e.g. 0.0001). Default: 0 (off)'
+    )
+    parser.add_argument(
+        '-sm', '--shared_memory',
+        type=str,
+        nargs='?',
+        const='',
+        default=None,
+        help='Share the live grid and team counts with other processes under this name (see shared_grid.py). Default: off, "pixels_fighting" if given without a name'
+    )
+    parser.add_argument(
+        '-hm', '--heatmap',
+        action='store_true',
+        help='Record the contention heatmap for the whole game and save it with the results. Default: off (only recorded while H shows it)'
+    )
     args = parser.parse_args()
+    if args.topology == 'hex' and args.grid_size % 2:
+        parser.error("the hex topology needs an even --grid_size") # Rows would not alternate across the wrap
 
     # Set up logging level
     log_level = getattr(logging, args.log_level.upper(), logging.INFO)
@@ -332,6 +203,7 @@ def main():
     UPDATES_PER_FRAME = args.updates_per_frame
     FRAME_RATE = args.frame_rate
     LEADERBOARD_WIDTH = 150
+    LEADERBOARD_TOP = 60 # Room for the FPS, timer and frame counter above the bars
     MAX_REAL_PIXELS = args.pixels
     PIXEL_SIZE = max(1, MAX_REAL_PIXELS // GRID_WIDTH)
 
@@ -347,7 +219,7 @@ def main():
     pygame.font.init()
     
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption(f"Pixels Fighting: {game_title} (R to Reset, P to Pause)")
+    pygame.display.set_caption(f"Pixels Fighting: {game_title} (R to Reset, P to Pause, S to Snapshot, H for Heatmap)")
     clock = pygame.time.Clock()
 
     # --- Font Setup ---
@@ -364,19 +236,28 @@ def main():
     # --- Simulation State ---
     grid = init_grid(GRID_WIDTH, GRID_HEIGHT, NUM_TEAMS)
     colors = generate_distinct_colors(NUM_TEAMS)
-    dead_color = (173, 173, 173) # Gray for dead pixels
+    palette = build_palette(colors) # Team colors + dead color, indexed by palette_indices()
     team_names = load_team_names(TEAM_NAMES_FILE, NUM_TEAMS)
-    color_surface_array = np.zeros((GRID_HEIGHT, GRID_WIDTH, 3), dtype=np.uint8)
+
+    # --- Drawing Buffers (allocated once, reused every frame and across resets) ---
+    palette_index_array = palette_indices(grid, NUM_TEAMS)
+    color_surface_array = np.zeros((GRID_WIDTH, GRID_HEIGHT, 3), dtype=np.uint8) # (x, y) order for surfarray
+    grid_surface = pygame.Surface((GRID_WIDTH, GRID_HEIGHT))
+    scaled_surface = pygame.Surface((SIM_WIDTH, SIM_HEIGHT))
 
     # --- Classes ---
-    TEAM_CLASSES = {}
-    #possible_classes = ["Berserker", "Sniper", "Assassin", "Bunker", "Phalanx", "Thorns", "Plague", "Nomad", "Necromancer", "Healer", "Mortar"]
-    # TODO fix/add all classes back
-    possible_classes = [Berserker, Healer, Sniper, Assassin]
+    TEAM_CLASSES = create_team_classes(NUM_TEAMS, level=log_level, topology=args.topology)
     HITPOINTS = {i: 0 for i in range(NUM_TEAMS)} # Track hitpoints for each team
-
-    for i in range(NUM_TEAMS):
-        TEAM_CLASSES[i] = random.choice(possible_classes)(i, level=log_level)
+    sync_engine = None
+    if args.update_mode == 'sync':
+        from sync_engine import SyncEngine
+        sync_engine = SyncEngine(grid.shape, TEAM_CLASSES, args.priority)
+    heatmap = ContentionHeatmap(grid.shape) # Captures/held attacks per pixel, saved with the results if --heatmap
+    show_heatmap = False
+    fire = None
+    if args.fire > 0:
+        from fire import FireField
+        fire = FireField(grid.shape, spark_chance=args.fire, topology=args.topology)
     
     # --- Game State Variables ---
     frame_count = 0
@@ -384,7 +265,7 @@ def main():
     simulation_running = True
     elapsed_ms = 0
     
-    team_active = [True] * NUM_TEAMS
+    team_active = np.ones(NUM_TEAMS, dtype=bool)
     elimination_times = [None] * NUM_TEAMS
     team_low_percents = np.full(NUM_TEAMS, 1.0)
     team_high_percents = np.zeros(NUM_TEAMS)
@@ -392,6 +273,47 @@ def main():
     
     history_data = []
 
+    # --- Leaderboard (cached rows, scrolls when there are too many teams to fit) ---
+    leaderboard = Leaderboard(
+        (SIM_WIDTH, LEADERBOARD_TOP, LEADERBOARD_WIDTH, WINDOW_HEIGHT - LEADERBOARD_TOP),
+        elim_font, NUM_TEAMS, TOTAL_PIXELS, percent_text_color, elim_text_color
+    )
+    leaderboard.set_teams(team_names, TEAM_CLASSES, colors)
+
+    # --- Live Stats (optional) ---
+    stats_publisher = None
+    if args.stats_port:
+        from stats_server import StatsPublisher
+        stats_publisher = StatsPublisher(args.stats_port)
+        if stats_publisher.start():
+            stats_publisher.publish_setup(stats_setup(game_title, team_names, TEAM_CLASSES, colors))
+        else:
+            stats_publisher = None # Port taken: play without live stats
+
+    # --- Win Odds (optional) ---
+    win_odds_estimator = None
+    win_odds = None # (win_probabilities, expected_frames_left) once available
+    if args.win_odds:
+        from win_odds import WinOddsEstimator
+        win_odds_estimator = WinOddsEstimator(
+            args.win_odds, updates_per_frame=UPDATES_PER_FRAME,
+            update_mode=args.update_mode, priority=args.priority, fire=args.fire
+        )
+
+    # --- Shared Memory Grid (optional) ---
+    grid_writer = None
+    if args.shared_memory is not None:
+        from shared_grid import SharedGridWriter, DEFAULT_NAME
+        shared_name = args.shared_memory or DEFAULT_NAME
+        try:
+            grid_writer = SharedGridWriter(grid.shape, NUM_TEAMS, shared_name, grid.dtype)
+        except FileExistsError as e:
+            parser.error(str(e)) # Another game is sharing under this name
+        grid_writer.publish(grid, count_teams(grid, NUM_TEAMS), 0)
+        print(f"--- Live grid shared as '{shared_name}' (read it with shared_grid.py) ---")
+
+    print(f"--- Startup took {(time.perf_counter() - STARTUP_START) * 1000:.0f} ms ---")
+
     # --- Final State Variables ---
     final_time_string = ""
     winner_color = (0,0,0)
@@ -400,13 +322,32 @@ def main():
     final_frames_string = ""
     final_lowest_string = ""
 
+    # --- Idle State ---
+    # Once the game is over nothing on screen changes by itself: the last frame
+    # is drawn once and the loop sleeps in pygame.event.wait() until an event
+    # asks for a redraw. A minimized window is not drawn at all.
+    needs_redraw = True
+    window_visible = True
+
     running = True
     while running:
         # --- Event Handling (Always runs) ---
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if not events and not simulation_running and not (needs_redraw and window_visible):
+            events = [pygame.event.wait()] # Game over and the screen is up to date
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+                window_visible = False
+            if event.type in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWEXPOSED):
+                window_visible = True
+                needs_redraw = True
+            if event.type == pygame.MOUSEWHEEL:
+                leaderboard.scroll(-event.y)
+                needs_redraw = True
             if event.type == pygame.KEYDOWN:
+                needs_redraw = True # Reset, heatmap, scrolling and unpausing all change the screen
                 if event.key == pygame.K_r:
                     # --- RESET ---
                     if args.title:
@@ -418,22 +359,39 @@ def main():
                         game_title_safe = game_title
                     
                     save_filename = os.path.join(RESULTS_DIR, f"{game_title_safe}.npz")
-                    pygame.display.set_caption(f"Pixels Fighting: {game_title} (R to Reset, P to Pause)")
+                    pygame.display.set_caption(f"Pixels Fighting: {game_title} (R to Reset, P to Pause, S to Snapshot, H for Heatmap)")
                     print(f"--- RESET: Starting New Game: {game_title} ---")
                     print(f"--- Data will be saved to: {save_filename} ---")
 
-                    grid = init_grid(GRID_WIDTH, GRID_HEIGHT, NUM_TEAMS)
-                    team_names = load_team_names(TEAM_NAMES_FILE, NUM_TEAMS)
+                    reset_start = time.perf_counter()
+                    init_grid(GRID_WIDTH, GRID_HEIGHT, NUM_TEAMS, out=grid) # Refill in place, a few rows at a time
+                    team_names = load_team_names(TEAM_NAMES_FILE, NUM_TEAMS) # Names file is only read once
+                    TEAM_CLASSES = reset_team_classes(TEAM_CLASSES, level=log_level)
+                    HITPOINTS = {i: 0 for i in range(NUM_TEAMS)}
+                    heatmap.clear()
+                    if fire:
+                        fire.clear()
+                    if sync_engine:
+                        sync_engine = SyncEngine(grid.shape, TEAM_CLASSES, args.priority)
                     frame_count = 0
                     start_time = pygame.time.get_ticks()
                     simulation_running = True
                     elapsed_ms = 0
-                    team_active = [True] * NUM_TEAMS
+                    team_active.fill(True)
                     elimination_times = [None] * NUM_TEAMS
-                    team_low_percents = np.full(NUM_TEAMS, 1.0)
-                    team_high_percents = np.zeros(NUM_TEAMS)
+                    team_low_percents.fill(1.0)
+                    team_high_percents.fill(0.0)
                     elimination_order = []
-                    history_data = []  
+                    history_data = []
+                    leaderboard.set_teams(team_names, TEAM_CLASSES, colors)
+                    if win_odds_estimator:
+                        win_odds_estimator.cancel()
+                        win_odds = None
+                    if stats_publisher:
+                        stats_publisher.publish_setup(stats_setup(game_title, team_names, TEAM_CLASSES, colors))
+                    if grid_writer:
+                        grid_writer.new_game(grid, count_teams(grid, NUM_TEAMS))
+                    print(f"--- Reset took {(time.perf_counter() - reset_start) * 1000:.1f} ms ---")
                     final_time_string = ""
                     final_fps_string = ""
                     final_timer_string = ""
@@ -443,9 +401,27 @@ def main():
                 if event.key == pygame.K_q:
                     running = False
                 
+                if event.key == pygame.K_h:
+                    show_heatmap = not show_heatmap
+                
+                if event.key == pygame.K_UP:
+                    leaderboard.scroll(-1)
+                if event.key == pygame.K_DOWN:
+                    leaderboard.scroll(1)
+                if event.key == pygame.K_PAGEUP:
+                    leaderboard.scroll(-leaderboard.visible_rows)
+                if event.key == pygame.K_PAGEDOWN:
+                    leaderboard.scroll(leaderboard.visible_rows)
+                
+                if event.key == pygame.K_s:
+                    # --- SNAPSHOT (can be resumed/rendered with exporter.py) ---
+                    snapshot_filename = save_filename.replace('.npz', f"_snapshot_{frame_count}.npz")
+                    save_snapshot(snapshot_filename, grid, colors, team_names, TEAM_CLASSES, frame_count)
+                    print(f"Snapshot saved to '{snapshot_filename}'")
+                
                 if event.key == pygame.K_p:
                     # Call the blocking pause function
-                    pause_result = pause_game(screen, clock, pause_font, SIM_WIDTH, SIM_HEIGHT)
+                    pause_result = pause_game(screen, pause_font, SIM_WIDTH, SIM_HEIGHT)
                     
                     if pause_result == 'quit':
                         running = False
@@ -463,12 +439,21 @@ def main():
 
         # --- Simulation Logic (Only if running) ---
         if simulation_running:
-            for _ in range(UPDATES_PER_FRAME):
-                run_simulation(grid, GRID_WIDTH, GRID_HEIGHT, TEAM_CLASSES, HITPOINTS)
+            sim_start = time.perf_counter()
+            frame_heatmap = heatmap if args.heatmap or show_heatmap else None # Recording costs time per attack
+            if sync_engine:
+                sync_engine.step(grid, frame_heatmap) # One generation: every pixel attacks once
+            else:
+                for _ in range(UPDATES_PER_FRAME):
+                    run_simulation(grid, GRID_WIDTH, GRID_HEIGHT, TEAM_CLASSES, HITPOINTS, frame_heatmap)
+                if frame_heatmap is not None:
+                    frame_heatmap.flush() # One batched update per frame
+            if fire:
+                fire.update(grid, TEAM_CLASSES) # Once per frame, not per attack
+            sim_ms = (time.perf_counter() - sim_start) * 1000
             frame_count += 1
             
-            filtered_grid = grid[grid >= 0] # Exclude dead pixels
-            counts = np.bincount(filtered_grid.ravel(), minlength=NUM_TEAMS)
+            counts = count_teams(grid, NUM_TEAMS)
             
             current_percents = counts / TOTAL_PIXELS
             history_data.append(current_percents)
@@ -476,24 +461,21 @@ def main():
             team_low_percents = np.minimum(team_low_percents, current_percents)
             team_high_percents = np.maximum(team_high_percents, current_percents)
 
-            active_team_count = 0
-            for i in range(NUM_TEAMS):
-                if team_active[i]:
-                    if counts[i] == 0: # Team was just eliminated
-                        team_active[i] = False
-                        elimination_order.append(i)
-                        max_percent = team_high_percents[i]
-                        elimination_times[i] = (
-                            f"Elim at: {current_time_string}", 
-                            f"Max: {max_percent * 100:.1f}%"
-                        )
-                    else:
-                        active_team_count += 1
+            for i in np.flatnonzero(team_active & (counts == 0)): # Teams that were just eliminated
+                team_active[i] = False
+                elimination_order.append(int(i))
+                max_percent = team_high_percents[i]
+                elimination_times[i] = (
+                    f"Elim at: {current_time_string}", 
+                    f"Max: {max_percent * 100:.1f}%"
+                )
+            active_team_count = np.count_nonzero(team_active)
             
             if active_team_count == 1:
                 simulation_running = False
+                needs_redraw = True # Draw the final frame and the winner screen once before going idle
                 final_time_string = current_time_string
-                winner_team_index = team_active.index(True)
+                winner_team_index = int(np.argmax(team_active))
                 winner_color = colors[winner_team_index]
                 
                 final_fps_string = f"FPS: {clock.get_fps():.1f}"
@@ -506,99 +488,72 @@ def main():
                 try:
                     print("Simulation ended. Saving data...")
                     final_data_array = np.array(history_data)
+                    extra = {'heatmap': heatmap.as_grid()} if args.heatmap else {}
                     np.savez_compressed(
                         save_filename, 
                         history=final_data_array, 
                         colors=colors, 
-                        names=team_names
+                        names=team_names,
+                        **extra
                     )
                     print(f"Data saved to '{save_filename}' with shape {final_data_array.shape}")
                 except Exception as e:
                     print(f"Error saving data: {e}")
-                
-        else: 
-            # Simulation is not running (game has ended)
-            filtered_grid = grid[grid >= 0] # Exclude dead pixels
-            counts = np.bincount(filtered_grid.ravel(), minlength=NUM_TEAMS)
+
+            if win_odds_estimator:
+                if simulation_running:
+                    win_odds = win_odds_estimator.poll()
+                    if frame_count - win_odds_estimator.submitted_frame >= WIN_ODDS_REFRESH_FRAMES:
+                        win_odds_estimator.submit(grid, TEAM_CLASSES, frame_count, fire) # No-op while busy
+                else:
+                    win_odds_estimator.cancel() # The game is decided
+                    win_odds = None
+
+            if stats_publisher:
+                # A fresh dict every frame: the publisher encodes it on its own thread
+                stats_publisher.publish({
+                    "frame": frame_count,
+                    "elapsed_ms": elapsed_ms,
+                    "fps": round(clock.get_fps(), 1),
+                    "sim_ms": round(sim_ms, 2),
+                    "update_mode": args.update_mode,
+                    "updates_per_frame": TOTAL_PIXELS if sync_engine else UPDATES_PER_FRAME, # Sync: every pixel attacks once
+                    "counts": counts.tolist(),
+                    "active": team_active.tolist(),
+                    "elimination_order": list(elimination_order),
+                    "finished": not simulation_running,
+                })
+
+            if grid_writer:
+                grid_writer.publish(grid, counts, frame_count, finished=not simulation_running)
+
+        # --- Idle: skip drawing while minimized or once the final frame is on screen ---
+        if not window_visible or not (simulation_running or needs_redraw):
+            if simulation_running:
+                clock.tick(FRAME_RATE) # A minimized game keeps playing at its normal pace
+            continue
+        needs_redraw = False # 'counts' still holds the final frame's counts once the game is over
 
         # --- Leaderboard Drawing Logic (Always runs) ---
-        # ... (this section is the same) ...
         leaderboard_x_start = SIM_WIDTH
         pygame.draw.rect(
             screen, (0, 0, 0),
-            (leaderboard_x_start, 0, LEADERBOARD_WIDTH, WINDOW_HEIGHT)
+            (leaderboard_x_start, 0, LEADERBOARD_WIDTH, LEADERBOARD_TOP)
+        )
+        leaderboard.draw(
+            screen, counts, team_active, elimination_order, elimination_times,
+            win_odds[0] if win_odds is not None else None
         )
-        
-        bar_padding = 2
-        text_y_offset = 60
-        bar_area_height = WINDOW_HEIGHT - text_y_offset
-        bar_slot_height = bar_area_height / NUM_TEAMS
-        bar_draw_height = bar_slot_height - bar_padding
-        
-        active_team_indices = [i for i in range(NUM_TEAMS) if team_active[i]]
-        sorted_active_indices = sorted(active_team_indices, key=lambda i: counts[i], reverse=True)
-        draw_order_indices = sorted_active_indices + list(reversed(elimination_order))
-
-        for slot, i in enumerate(draw_order_indices):
-            bar_y = (slot * bar_slot_height) + text_y_offset
-            bg_bar_rect = pygame.Rect(
-                leaderboard_x_start + 2, bar_y, LEADERBOARD_WIDTH - 4, bar_draw_height
-            )
-
-            if team_active[i]:
-                percent = counts[i] / TOTAL_PIXELS
-                color = colors[i]
-                filled_width = int(percent * (LEADERBOARD_WIDTH - 4))
-                
-                pygame.draw.rect(screen, (40, 40, 40), bg_bar_rect)
-                
-                fill_bar_rect = pygame.Rect(
-                    leaderboard_x_start + 2, bar_y, filled_width, bar_draw_height
-                )
-                pygame.draw.rect(screen, color, fill_bar_rect)
-                
-                name_surf = elim_font.render(team_names[i] + " (" + TEAM_CLASSES[i].get_name() + ")", True, percent_text_color)
-                name_rect = name_surf.get_rect(
-                    centery=bg_bar_rect.centery - 7, 
-                    left=bg_bar_rect.left + 5
-                )
-                screen.blit(name_surf, name_rect)
-
-                percent_string = f"{percent * 100:.1f}%"
-                percent_surf = elim_font.render(percent_string, True, percent_text_color)
-                
-                percent_rect = percent_surf.get_rect(
-                    centery=bg_bar_rect.centery + 7,
-                    right=bg_bar_rect.right - 5
-                )
-                screen.blit(percent_surf, percent_rect)
-                
-            else:
-                color = colors[i]
-                pygame.draw.rect(screen, color, bg_bar_rect) 
-                
-                name_surf = elim_font.render(team_names[i] + " (" + TEAM_CLASSES[i].get_name() + ")", True, elim_text_color)
-                name_rect = name_surf.get_rect(
-                    center=(bg_bar_rect.centerx, bg_bar_rect.centery - 10)
-                )
-                screen.blit(name_surf, name_rect)
-
-                elim_time_str, elim_max_str = elimination_times[i]
-                
-                elim_surf_1 = elim_font.render(elim_time_str, True, elim_text_color)
-                elim_rect_1 = elim_surf_1.get_rect(center=(bg_bar_rect.centerx, bg_bar_rect.centery + 2))
-                screen.blit(elim_surf_1, elim_rect_1)
-                
-                elim_surf_2 = elim_font.render(elim_max_str, True, elim_text_color)
-                elim_rect_2 = elim_surf_2.get_rect(center=(bg_bar_rect.centerx, bg_bar_rect.centery + 14))
-                screen.blit(elim_surf_2, elim_rect_2)
 
         # --- Simulation Drawing Logic (Always runs) ---
-        color_surface_array[...] = colors[grid]
-        negative_mask = (grid < 0)
-        color_surface_array[negative_mask] = dead_color
-        surface = pygame.surfarray.make_surface(np.transpose(color_surface_array, (1, 0, 2)))
-        scaled_surface = pygame.transform.scale(surface, (SIM_WIDTH, SIM_HEIGHT))
+        palette_indices(grid, NUM_TEAMS, out=palette_index_array)
+        np.take(palette, palette_index_array.T, axis=0, out=color_surface_array)
+        if fire:
+            fire.blend(color_surface_array)
+        if show_heatmap:
+            heatmap.blend(color_surface_array)
+        pygame.surfarray.blit_array(grid_surface, color_surface_array)
+        pygame.transform.scale(grid_surface, (SIM_WIDTH, SIM_HEIGHT), scaled_surface)
         screen.blit(scaled_surface, (0, 0))
 
         # --- UI Text Drawing (Handles both running and frozen) ---
@@ -621,6 +576,12 @@ def main():
 
         frames_text_surf = ui_font.render(frames_string, True, text_color)
         screen.blit(frames_text_surf, (text_x, 45))
+
+        if simulation_running and win_odds is not None:
+            # Expected frames until the game is decided, from the rollouts
+            frames_left = max(0, win_odds[1] - (frame_count - win_odds_estimator.result_frame))
+            eta_surf = elim_font.render(f"~{frames_left:.0f} left", True, text_color)
+            screen.blit(eta_surf, eta_surf.get_rect(right=WINDOW_WIDTH - 5, top=8))
         
         # --- Win Screen Drawing (Only if sim is not running) ---
         if not simulation_running:
@@ -650,6 +611,12 @@ def main():
         pygame.display.flip()
         clock.tick(FRAME_RATE) 
 
+    if stats_publisher:
+        stats_publisher.stop()
+    if win_odds_estimator:
+        win_odds_estimator.close()
+    if grid_writer:
+        grid_writer.close()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -121,6 +121,16 @@ def main():
     # 7. Show the plot!
     fig.show()
 
+    # 8. Show where the fighting happened, if the file has a contention heatmap
+    if 'heatmap' in data:
+        captures, holds = data['heatmap']
+        heat_fig = px.imshow(
+            np.log1p(captures + holds),
+            color_continuous_scale='hot',
+            title=f'Pixel Fighting: Contention Heatmap (log of captures + held attacks)<br><i>{plot_title_name}</i>'
+        )
+        heat_fig.show()
+
 if __name__ == "__main__":
     main()
 
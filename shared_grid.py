@@ -0,0 +1,280 @@
+"""
+Shares the live grid of a running game with other processes through a named
+shared memory segment, so notebooks and dashboards can look at every pixel
+without slowing the game down.
+
+Start the game with `pixels-fighting.py --shared_memory` (segment name
+"pixels_fighting" unless another one is given). Once per frame the game copies
+the grid and the team counts into the segment; readers attach by name and
+read them in place. The segment starts with a small header:
+
+    offset  type     field
+    0       4s       magic b"PXFG"
+    4       uint16   layout version (1)
+    6       uint16   header size in bytes (72), the grid follows right after it
+    8       uint64   seq: odd while the game is writing, even when consistent
+    16      uint64   frame number
+    24      uint64   game number, +1 on every reset
+    32      uint32   grid height
+    36      uint32   grid width
+    40      uint32   number of teams
+    44      uint32   flags (bit 0: the game has a winner)
+    48      8s       grid dtype (numpy dtype string, e.g. "<i4")
+    56      8s       counts dtype
+    64      uint32   pid of the game writing the segment
+    68      4 bytes  reserved
+    72      grid (height * width), then the counts (num_teams), 8-byte aligned
+
+All integers are little-endian. The seq field is a seqlock: a reader notes
+seq, reads, and keeps what it read only if seq is still the same even number.
+The writer's pid lets a new game tell a segment left behind by a crashed game
+(replaced) from one that belongs to a game still running (refused: give each
+game its own --shared_memory name).
+This module only needs numpy and the standard library, so it can be copied
+next to any analysis script.
+
+Example:
+    from shared_grid import SharedGridReader
+    with SharedGridReader() as reader:
+        snapshot = reader.read() # Consistent copies of grid and counts
+        print(snapshot.frame, snapshot.counts)
+
+or, to follow a running game from a terminal:
+    python shared_grid.py
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+DEFAULT_NAME = "pixels_fighting"
+MAGIC = b"PXFG"
+VERSION = 1
+HEADER_SIZE = 72
+FIXED_HEADER = struct.Struct("<4sHH")
+SHAPE_HEADER = struct.Struct("<III") # height, width, num_teams at offset 32
+DTYPES_HEADER = struct.Struct("<8s8s") # at offset 48
+PID_HEADER = struct.Struct("<I") # at offset 64
+FLAG_FINISHED = 1
+
+Snapshot = namedtuple("Snapshot", ["frame", "game", "finished", "grid", "counts"])
+
+
+def _layout(height, width, num_teams, grid_dtype, counts_dtype):
+    """Byte offsets of the grid and the counts, and the total segment size."""
+    grid_offset = HEADER_SIZE
+    counts_offset = grid_offset + height * width * np.dtype(grid_dtype).itemsize
+    counts_offset += -counts_offset % 8
+    return grid_offset, counts_offset, counts_offset + num_teams * np.dtype(counts_dtype).itemsize
+
+
+def _attach_untracked(name):
+    """Attaches to an existing segment without handing it to the resource tracker, which would remove it when this process exits."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _writer_alive(pid):
+    """True if the process that wrote a segment may still be running."""
+    if sys.platform == "win32":
+        return True # Windows frees a segment with its last handle, so an existing one is always in use
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True # Running, as another user
+    return True
+
+
+class _SharedGrid:
+    """Views into a segment laid out as described above."""
+    def _map(self):
+        buf = self.shm.buf
+        self.seqs = np.ndarray(3, dtype="<u8", buffer=buf, offset=8) # seq, frame, game
+        self.flags = np.ndarray(1, dtype="<u4", buffer=buf, offset=44)
+        height, width, num_teams = SHAPE_HEADER.unpack_from(buf, 32)
+        grid_dtype, counts_dtype = (s.rstrip(b"\0").decode() for s in DTYPES_HEADER.unpack_from(buf, 48))
+        grid_offset, counts_offset, _ = _layout(height, width, num_teams, grid_dtype, counts_dtype)
+        self.shape = (height, width)
+        self.num_teams = num_teams
+        self.grid = np.ndarray(self.shape, dtype=grid_dtype, buffer=buf, offset=grid_offset)
+        self.counts = np.ndarray(num_teams, dtype=counts_dtype, buffer=buf, offset=counts_offset)
+
+    def _release(self):
+        # Views into the buffer have to go before the segment can be closed
+        self.seqs = self.flags = self.grid = self.counts = None
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedGridWriter(_SharedGrid):
+    """The game's side: owns the segment and publishes one consistent frame at a time."""
+    def __init__(self, grid_shape, num_teams, name=DEFAULT_NAME, grid_dtype=np.int32, counts_dtype=np.int64):
+        height, width = grid_shape
+        grid_dtype, counts_dtype = np.dtype(grid_dtype).newbyteorder("<"), np.dtype(counts_dtype).newbyteorder("<")
+        _, _, size = _layout(height, width, num_teams, grid_dtype, counts_dtype)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._replace_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+
+        buf = self.shm.buf
+        buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        SHAPE_HEADER.pack_into(buf, 32, height, width, num_teams)
+        DTYPES_HEADER.pack_into(buf, 48, grid_dtype.str.encode(), counts_dtype.str.encode())
+        PID_HEADER.pack_into(buf, 64, os.getpid())
+        FIXED_HEADER.pack_into(buf, 0, MAGIC, VERSION, HEADER_SIZE) # Magic last: the header is complete
+        self._map()
+
+    @staticmethod
+    def _replace_stale(name):
+        """Unlinks a segment left behind by a game that crashed. Raises FileExistsError if it is still in use."""
+        existing = _attach_untracked(name)
+        try:
+            buf = existing.buf
+            ours = existing.size >= HEADER_SIZE and FIXED_HEADER.unpack_from(buf, 0) == (MAGIC, VERSION, HEADER_SIZE)
+            pid = PID_HEADER.unpack_from(buf, 64)[0] if ours else 0
+            del buf
+        finally:
+            existing.close()
+        if not ours or _writer_alive(pid):
+            owner = f"game {pid}" if ours else "another program"
+            raise FileExistsError(
+                f"Shared memory '{name}' is in use by {owner}; give this game its own name with --shared_memory NAME"
+            )
+        stale = shared_memory.SharedMemory(name=name) # Tracked, so unlink() has something to unregister
+        stale.close()
+        stale.unlink()
+
+    def publish(self, grid, counts, frame, finished=False, game=None):
+        """Copies this frame's grid and team counts (and a new game number, if given) into the segment."""
+        seqs = self.seqs
+        seqs[0] += 1 # Odd: readers retry
+        self.grid[...] = grid
+        self.counts[...] = counts
+        seqs[1] = frame
+        if game is not None:
+            seqs[2] = game
+        self.flags[0] = FLAG_FINISHED if finished else 0
+        seqs[0] += 1
+
+    def new_game(self, grid, counts):
+        """Publishes frame 0 of a new game (after a reset)."""
+        self.publish(grid, counts, 0, game=int(self.seqs[2]) + 1)
+
+    def close(self):
+        """Removes the segment. Readers that are still attached keep their (now frozen) copy."""
+        self._release()
+        self.shm.unlink()
+
+
+class SharedGridReader(_SharedGrid):
+    """
+    Attaches to a running game's segment. 'grid' and 'counts' are read-only
+    views straight into shared memory; read() returns consistent copies, and
+    begin()/consistent() let callers work on the views directly.
+    """
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = _attach_untracked(name)
+        magic, version, header_size = FIXED_HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION or header_size != HEADER_SIZE:
+            self.shm.close()
+            raise ValueError(f"'{name}' is not a pixels fighting grid (layout version {VERSION})")
+        self.name = name
+        self._map()
+        self.grid.flags.writeable = False
+        self.counts.flags.writeable = False
+
+    @property
+    def seq(self):
+        return int(self.seqs[0])
+
+    def begin(self):
+        """Waits until the game is between writes. Returns the seq to check with consistent()."""
+        while True:
+            seq = int(self.seqs[0])
+            if not seq & 1:
+                return seq
+            time.sleep(0) # The game is writing: a copy takes well under a millisecond
+
+    def consistent(self, seq):
+        """True if nothing was written since begin() returned 'seq', i.e. the views were stable."""
+        return int(self.seqs[0]) == seq
+
+    def read(self, grid_out=None, counts_out=None):
+        """Consistent copies of the latest frame as a Snapshot. Pass preallocated arrays to avoid allocations."""
+        if grid_out is None:
+            grid_out = np.empty(self.shape, dtype=self.grid.dtype)
+        if counts_out is None:
+            counts_out = np.empty(self.num_teams, dtype=self.counts.dtype)
+        while True:
+            seq = self.begin()
+            grid_out[...] = self.grid
+            counts_out[...] = self.counts
+            frame, game, flags = int(self.seqs[1]), int(self.seqs[2]), int(self.flags[0])
+            if self.consistent(seq):
+                return Snapshot(frame, game, bool(flags & FLAG_FINISHED), grid_out, counts_out)
+
+    def wait(self, seq, timeout=None, poll=0.002):
+        """Waits for a frame newer than 'seq' (from begin() or self.seq). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while int(self.seqs[0]) == seq:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self):
+        self._release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow a running game through its shared memory grid.")
+    parser.add_argument(
+        '-n', '--name',
+        type=str,
+        default=DEFAULT_NAME,
+        help=f'Shared memory segment name. Default: {DEFAULT_NAME}'
+    )
+    parser.add_argument(
+        '-i', '--interval',
+        type=float,
+        default=1.0,
+        help='Seconds between two printed frames. Default: 1'
+    )
+    args = parser.parse_args()
+
+    with SharedGridReader(args.name) as reader:
+        print(f"Attached to '{args.name}': {reader.shape[0]}x{reader.shape[1]} grid, {reader.num_teams} teams")
+        grid, counts = np.empty_like(reader.grid), np.empty_like(reader.counts)
+        try:
+            while True:
+                snapshot = reader.read(grid, counts)
+                state = "finished" if snapshot.finished else "running"
+                print(f"game {snapshot.game} frame {snapshot.frame} ({state}): {snapshot.counts.tolist()}")
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
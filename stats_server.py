@@ -0,0 +1,193 @@
+"""
+Publishes live game statistics on a local HTTP port as Server-Sent Events, so
+external dashboards can follow a running game.
+
+The game loop only hands over a reference to the newest stats dict; encoding and
+sending happen on an asyncio loop in a background thread. Each client always gets
+the newest frame, so a slow client simply skips frames (downsampling) and one
+that stays backed up for too long is disconnected. The simulation never waits.
+
+Endpoints (localhost only by default):
+    /stats   text/event-stream: a 'setup' event (names, classes, colors), then one 'stats' event per frame
+    /latest  the newest stats as a single JSON document
+    Add ?hz=N to /stats to receive at most N frames per second.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+
+class StatsPublisher:
+    def __init__(self, port, host="127.0.0.1", max_client_buffer=256 * 1024, drop_after=5.0):
+        """
+        port: TCP port to listen on.
+        max_client_buffer: bytes queued for one client before it starts skipping frames.
+        drop_after: seconds a client may stay over that limit before it is disconnected.
+        """
+        self.host = host
+        self.port = port
+        self.max_client_buffer = max_client_buffer
+        self.drop_after = drop_after
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.clients = set() # asyncio.Event per connected /stats client
+        self.handlers = set() # Running client handler tasks, cancelled on stop()
+        self.error = None # Why the server could not start, if it could not
+        self.latest = None # (frame_seq, stats dict) - replaced, never mutated
+        self.latest_json = None
+        self.setup = None
+        self.setup_seq = 0
+        self.frame_seq = 0
+
+    # --- Game loop side (never blocks) ---
+    def start(self):
+        """
+        Starts the background thread and the server. Returns True once it is
+        listening, or False if it could not start (e.g. the port is taken).
+        """
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), name="stats-server", daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            print(f"--- Live stats disabled: cannot listen on {self.host}:{self.port} ({self.error}) ---")
+            return False
+        print(f"--- Live stats available at http://{self.host}:{self.port}/stats ---")
+        return True
+
+    def publish(self, stats):
+        """Hands the newest stats to the publisher. 'stats' must not be modified afterwards."""
+        self.frame_seq += 1
+        self.latest = (self.frame_seq, stats)
+        if self.clients:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def publish_setup(self, setup):
+        """Sets the per-game information (names, classes, colors) sent on connect and after resets."""
+        self.setup = setup
+        self.setup_seq += 1
+        if self.loop is not None and self.clients:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def stop(self):
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            self.thread.join(timeout=1.0)
+
+    # --- Asyncio side ---
+    def _run(self, ready):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self.server = loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+            self.loop = loop
+        except OSError as e:
+            self.error = e
+            loop.close()
+            return
+        finally:
+            ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            self.loop.close()
+
+    async def _shutdown(self):
+        """Closes the server and lets every client handler finish before the loop stops."""
+        self.server.close()
+        for task in self.handlers:
+            task.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.loop.stop()
+
+    def _wake(self):
+        for event in self.clients:
+            event.set()
+
+    def _encoded_latest(self):
+        """JSON of the newest stats, encoded once per frame no matter how many clients there are."""
+        latest = self.latest
+        if latest is None:
+            return None, None
+        if self.latest_json is None or self.latest_json[0] != latest[0]:
+            self.latest_json = (latest[0], json.dumps(latest[1]))
+        return self.latest_json
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            while (await asyncio.wait_for(reader.readline(), timeout=5.0)) not in (b"\r\n", b"\n", b""):
+                pass # Ignore request headers
+            parts = request_line.decode("latin-1").split()
+            url = urlsplit(parts[1] if len(parts) > 1 else "/")
+
+            if url.path == "/stats":
+                hz = float(parse_qs(url.query).get("hz", ["0"])[0])
+                await self._stream(writer, 1.0 / hz if hz > 0 else 0.0)
+            elif url.path == "/latest":
+                _, body = self._encoded_latest()
+                body = (body or "{}").encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nAccess-Control-Allow-Origin: *\r\n"
+                    + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass # stop(): end quietly, the task is not awaited by the stream machinery
+        finally:
+            writer.close()
+            self.handlers.discard(task)
+
+    async def _stream(self, writer, min_interval):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\n"
+        )
+        event = asyncio.Event()
+        event.set() # Send the current state right away
+        self.clients.add(event)
+        sent_frame = 0
+        sent_setup = 0
+        backed_up_since = None
+        try:
+            while not writer.is_closing():
+                await event.wait()
+                event.clear()
+
+                if writer.transport.get_write_buffer_size() > self.max_client_buffer:
+                    # Slow client: skip this frame, drop it if it never catches up
+                    now = time.monotonic()
+                    backed_up_since = backed_up_since or now
+                    if now - backed_up_since > self.drop_after:
+                        break
+                    await asyncio.sleep(0.05)
+                    event.set()
+                    continue
+                backed_up_since = None
+
+                if self.setup is not None and sent_setup != self.setup_seq:
+                    sent_setup = self.setup_seq
+                    writer.write(f"event: setup\ndata: {json.dumps(self.setup)}\n\n".encode())
+                frame_seq, body = self._encoded_latest()
+                if body is not None and frame_seq != sent_frame:
+                    sent_frame = frame_seq
+                    writer.write(f"event: stats\ndata: {body}\n\n".encode())
+
+                if min_interval:
+                    await asyncio.sleep(min_interval)
+        finally:
+            self.clients.discard(event)
@@ -0,0 +1,155 @@
+"""
+Synchronous "generation" update mode: every pixel attacks once per tick, like a
+cellular automaton, instead of run_simulation()'s one random attacker at a time.
+
+Each class rule is applied to the whole grid at once as array stencils, using the
+same rule tables as the batch engine (batch_engine.class_rules) and the teams'
+topology neighbor tables (topology.py):
+    pick_defender  every pixel picks one of its neighbors at its class's range;
+                   Assassins retry up to 3 times while they hit an ally
+    defend         Sniper sneakiness per attack; a Healer team's health blocks as
+                   many attacks as it has health points (chosen at random)
+    attack         single pixel capture, or Berserker cluster conversion of the
+                   defender's team in the block around the target
+All claims are computed from the grid as it was at the start of the tick, then
+simultaneous claims on the same pixel are resolved by priority: 'random' (a fresh
+random order every tick) or 'index' (the attacker with the lowest pixel index
+wins, fully reproducible for a given seed).
+"""
+
+import numpy as np
+
+from batch_engine import class_rules
+from topology import class_topology
+
+PRIORITIES = ('random', 'index')
+
+
+class SyncEngine:
+    def __init__(self, grid_shape, team_classes, priority='random', seed=None):
+        """
+        grid_shape: (height, width) of the grids this engine will step.
+        team_classes: {team_id: instance}; Healer health is read from and written back to them.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+        self.H, self.W = grid_shape
+        self.priority = priority
+        self.rng = np.random.default_rng(seed)
+        self.team_classes = team_classes
+
+        # --- Per-team rule tables ---
+        rules = [class_rules(team_classes[i]) for i in range(len(team_classes))]
+        self.range = np.array([r['range'] for r in rules])
+        self.pick_tries = np.array([r['pick_tries'] for r in rules])
+        self.defend_chance = np.array([r['defend_chance'] for r in rules])
+        self.uses_health = np.array([r['uses_health'] for r in rules])
+        self.health = np.array([r['health'] for r in rules], dtype=np.int64)
+        self.max_health = np.array([r['max_health'] for r in rules], dtype=np.int64)
+        self.cluster = np.array([r['cluster'] for r in rules])
+        self.convert_chance = np.array([r['convert_chance'] for r in rules])
+
+        # --- Shared neighbor tables (flat index -> neighbors at each range) ---
+        self.topology = class_topology(team_classes, grid_shape)
+        self.cluster_table = self.topology.neighbor_table(1)
+        self.pick_tables = {int(r): self.topology.neighbor_table(int(r)).ravel() for r in np.unique(self.range)}
+
+    def _offset(self, rows, radius):
+        """Flat index of a random neighbor of each row at its radius. Picks off the map hit the row's own pixel."""
+        table_index = rows * self.topology.K + self.rng.integers(0, self.topology.K, size=len(rows))
+        if len(self.pick_tables) == 1:
+            out = next(iter(self.pick_tables.values())).take(table_index)
+        else:
+            out = np.empty(len(rows), dtype=np.int64)
+            for r, table in self.pick_tables.items():
+                sel = np.flatnonzero(radius == r)
+                out[sel] = table.take(table_index[sel])
+        return np.where(out >= 0, out, rows)
+
+    def step(self, grid, heatmap=None):
+        """
+        Advances 'grid' (modified in place, must be C-contiguous) by one generation.
+        If a ContentionHeatmap is given, this generation's captures and held attacks are added to it.
+        """
+        if not grid.flags.c_contiguous:
+            raise ValueError("grid must be C-contiguous")
+        flat = grid.reshape(-1)
+        team = flat.copy() # Every pixel's team at the start of the tick
+        n = len(team)
+
+        # --- pick_defender for every pixel ---
+        target = self._offset(np.arange(n), self.range[team])
+        tries = self.pick_tries[team]
+        for attempt in range(1, int(tries.max())):
+            rows = np.flatnonzero((team[target] == team) & (attempt < tries))
+            if len(rows) == 0:
+                break
+            target[rows] = self._offset(rows, self.range[team[rows]])
+        target_team = team[target]
+
+        # --- Own team: Healers heal (applied after this tick's defenses) ---
+        same = target_team == team
+        heals = np.bincount(team[same & self.uses_health[team]], minlength=len(self.range))
+
+        # --- defend ---
+        fight = np.flatnonzero(~same)
+        attackers, defenders = team[fight], target_team[fight]
+        blocked = self.rng.random(len(fight)) < self.defend_chance[defenders]
+        health_rows = np.flatnonzero(self.uses_health[defenders])
+        if len(health_rows):
+            # Each Healer team blocks up to 'health' of the attacks against it, picked at random
+            order = health_rows[np.lexsort((self.rng.random(len(health_rows)), defenders[health_rows]))]
+            ordered_teams = defenders[order]
+            group_start = np.searchsorted(ordered_teams, ordered_teams, side='left')
+            rank = np.arange(len(order)) - group_start
+            spent = rank < self.health[ordered_teams]
+            blocked[order[spent]] = True
+            self.health -= np.bincount(ordered_teams[spent], minlength=len(self.health))
+        self.health = np.where(self.health < self.max_health, np.minimum(self.health + heals, self.max_health), self.health)
+
+        won = fight[~blocked]
+        if heatmap is not None:
+            heatmap.add(np.empty(0, dtype=np.intp), target[fight[blocked]])
+        if len(won) == 0:
+            self._write_back()
+            return
+
+        # --- attack: collect claims (cell, team, attacker pixel) ---
+        cluster = self.cluster[team[won]]
+        single = won[~cluster]
+        claim_cells = [target[single]]
+        claim_teams = [team[single]]
+        claim_attackers = [single]
+
+        burst = won[cluster]
+        if len(burst):
+            cells = self.cluster_table[target[burst]]
+            on_map = cells >= 0
+            cells = np.where(on_map, cells, 0)
+            chance = self.convert_chance[team[burst]][:, None]
+            convert = on_map & (team[cells] == target_team[burst][:, None]) & (self.rng.random(cells.shape) < chance)
+            claim_cells.append(cells[convert])
+            claim_teams.append(np.broadcast_to(team[burst][:, None], cells.shape)[convert])
+            claim_attackers.append(np.broadcast_to(burst[:, None], cells.shape)[convert])
+
+        claim_cells = np.concatenate(claim_cells)
+        claim_teams = np.concatenate(claim_teams)
+        claim_attackers = np.concatenate(claim_attackers)
+
+        # --- Resolve simultaneous claims: the highest priority claim on each cell wins ---
+        if self.priority == 'random':
+            priority = self.rng.permutation(len(claim_cells))
+        else:
+            priority = n - claim_attackers # Lowest attacker index first; unique per cell
+        best = np.full(n, -1, dtype=np.int64)
+        np.maximum.at(best, claim_cells, priority)
+        winners = priority == best[claim_cells]
+        flat[claim_cells[winners]] = claim_teams[winners]
+        if heatmap is not None:
+            heatmap.add(claim_cells[winners], np.empty(0, dtype=np.intp)) # Claims only target other teams
+        self._write_back()
+
+    def _write_back(self):
+        """Keeps the Healer instances' health in sync with the engine's table."""
+        for i in np.flatnonzero(self.uses_health):
+            self.team_classes[i].health = int(self.health[i])
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the top-level modules (engine, sync_engine, ...) like the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
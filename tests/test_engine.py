@@ -0,0 +1,15 @@
+import numpy as np
+import pytest
+
+from engine import INIT_BLOCK_ROWS, init_grid
+
+
+@pytest.mark.parametrize("height", [1, INIT_BLOCK_ROWS, 3 * INIT_BLOCK_ROWS + 5])
+def test_refilled_grid_matches_a_new_one(height):
+    """Resets refill the grid in blocks of rows; a seeded game must still start from the same grid."""
+    np.random.seed(3)
+    expected = init_grid(37, height, 5)
+    grid = np.full((height, 37), -1, dtype=np.int32)
+    np.random.seed(3)
+    assert init_grid(37, height, 5, out=grid) is grid
+    np.testing.assert_array_equal(grid, expected)
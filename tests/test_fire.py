@@ -0,0 +1,23 @@
+import logging
+
+import numpy as np
+import pytest
+
+from engine import make_team_class
+from fire import MAX_FRAMES, FireField
+
+
+@pytest.mark.parametrize("durations", [{"burn_frames": MAX_FRAMES + 1}, {"ash_frames": 200}, {"burn_frames": 0}, {"ash_frames": -5}])
+def test_durations_must_fit_the_int8_field(durations):
+    with pytest.raises(ValueError, match="between 1 and 127"):
+        FireField((8, 8), **durations)
+
+
+def test_longest_durations_count_down_without_wrapping():
+    field = FireField((8, 8), spark_chance=0, spread_chance=0, burn_frames=MAX_FRAMES, ash_frames=MAX_FRAMES, seed=0)
+    grid = np.zeros((8, 8), dtype=np.int32)
+    team_classes = {0: make_team_class("Berserker", 0, level=logging.WARNING)}
+    field.fire[0, 0] = MAX_FRAMES
+    for _ in range(MAX_FRAMES):
+        field.update(grid, team_classes)
+    assert field.fire[0, 0] == -(MAX_FRAMES - 1) # Burnt out, one frame of ash already counted down
@@ -0,0 +1,53 @@
+import logging
+import random
+
+import numpy as np
+import pytest
+
+from engine import init_grid, make_team_class, run_simulation
+from heatmap import ContentionHeatmap
+from sync_engine import SyncEngine
+
+GRID_SIZE = 30
+
+
+def berserker_game(num_teams=3):
+    random.seed(0)
+    np.random.seed(0)
+    grid = init_grid(GRID_SIZE, GRID_SIZE, num_teams)
+    team_classes = {i: make_team_class("Berserker", i, level=logging.WARNING) for i in range(num_teams)}
+    return grid, team_classes
+
+
+def async_step(grid, team_classes, heatmap):
+    """One attack: a pixel can only change owner once, so the diff counts every capture."""
+    run_simulation(grid, GRID_SIZE, GRID_SIZE, team_classes, {i: 0 for i in team_classes}, heatmap)
+    heatmap.flush()
+
+
+def sync_step(engine):
+    return lambda grid, team_classes, heatmap: engine.step(grid, heatmap)
+
+
+@pytest.mark.parametrize("engine", ["async", "sync"])
+def test_berserker_heatmap_counts_every_changed_pixel(engine):
+    """
+    Berserkers never defend, so no attack can be held, and a won attack
+    converts a whole cluster (or nothing). Both engines must record exactly
+    the pixels that changed owner, so their heatmaps are comparable.
+    """
+    grid, team_classes = berserker_game()
+    heatmap = ContentionHeatmap(grid.shape)
+    if engine == "async":
+        step, steps = async_step, 2000
+    else:
+        step, steps = sync_step(SyncEngine(grid.shape, team_classes, seed=0)), 20 # One generation per step
+    changed = 0
+    for _ in range(steps):
+        before = grid.copy()
+        step(grid, team_classes, heatmap)
+        changed += np.count_nonzero(grid != before)
+        assert heatmap.captures.sum() == changed
+    assert changed > 0
+    assert heatmap.holds.sum() == 0
+
@@ -0,0 +1,50 @@
+import os
+import runpy
+import sys
+
+import pygame
+
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pixels-fighting.py")
+
+
+class LoggingFont:
+    """Wraps a pygame font and logs every rendered string."""
+    def __init__(self, font, log):
+        self._font = font
+        self._log = log
+
+    def render(self, text, *args, **kwargs):
+        self._log.append(("render", text))
+        return self._font.render(text, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._font, name)
+
+
+def test_final_frame_is_drawn_before_idle_wait(monkeypatch, tmp_path):
+    """A small 2-team game ends after some frames; the winner screen must be on the display before the loop sleeps."""
+    log = []
+    sys_font = pygame.font.SysFont
+    flip = pygame.display.flip
+
+    def logging_wait(*args, **kwargs):
+        log.append(("wait",))
+        return pygame.event.Event(pygame.QUIT)
+
+    def logging_flip(*args):
+        log.append(("flip",))
+        return flip(*args)
+
+    monkeypatch.setattr(pygame.font, "SysFont", lambda *a, **k: LoggingFont(sys_font(*a, **k), log))
+    monkeypatch.setattr(pygame.display, "flip", logging_flip)
+    monkeypatch.setattr(pygame.event, "wait", logging_wait)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["pixels-fighting.py", "-s", "16", "-t", "2", "-u", "200", "-f", "1000", "-ll", "WARNING"])
+
+    runpy.run_path(GAME_SCRIPT, run_name="__main__")
+
+    assert ("wait",) in log, "the finished game never went idle"
+    before_wait = log[:log.index(("wait",))]
+    assert ("render", "WINNER!") in before_wait, "the winner screen was not drawn before the loop slept"
+    last_winner = len(before_wait) - 1 - before_wait[::-1].index(("render", "WINNER!"))
+    assert ("flip",) in before_wait[last_winner:], "the winner screen was drawn but never flipped to the display"
@@ -0,0 +1,14 @@
+import numpy as np
+
+from leaderboard import rank_teams
+
+
+def test_every_scroll_window_agrees_with_the_full_ranking():
+    """Teams tied on pixel count are ordered by index, so a shorter list is always a prefix of a longer one."""
+    counts = np.array([5, 9, 5, 5, 0, 9, 5, 1, 5, 9], dtype=np.int64)
+    team_active = counts > 0
+    elimination_order = [4]
+    full = rank_teams(counts, team_active, elimination_order, len(counts)).tolist()
+    assert full == [1, 5, 9, 0, 2, 3, 6, 8, 7, 4]
+    for stop in range(1, len(counts) + 1):
+        assert rank_teams(counts, team_active, elimination_order, stop).tolist() == full[:stop]
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from shared_grid import PID_HEADER, SharedGridReader, SharedGridWriter
+
+
+class RecordingSeqs:
+    """Wraps the writer's seq/frame/game words and logs every write with the seq value at that moment."""
+    def __init__(self, seqs, log):
+        self._seqs = seqs
+        self._log = log
+
+    def __getitem__(self, index):
+        return self._seqs[index]
+
+    def __setitem__(self, index, value):
+        self._log.append((index, int(self._seqs[0])))
+        self._seqs[index] = value
+
+
+def test_new_game_number_is_written_inside_the_seqlock(tmp_path):
+    grid = np.zeros((4, 6), dtype=np.int32)
+    counts = np.array([24, 0], dtype=np.int32)
+    writer = SharedGridWriter(grid.shape, 2, name=f"pxfg_test_{tmp_path.name}")
+    try:
+        writer.publish(grid, counts, 7)
+        log = []
+        writer.seqs = RecordingSeqs(writer.seqs, log)
+        writer.new_game(grid, counts)
+        assert [seq % 2 for index, seq in log if index != 0] == [1, 1], "frame/game words written while seq was even"
+
+        reader = SharedGridReader(writer.shm.name)
+        try:
+            snapshot = reader.read()
+            assert (snapshot.frame, snapshot.game) == (0, 1)
+        finally:
+            reader.close()
+    finally:
+        writer.seqs = writer.seqs._seqs
+        writer.close()
+
+
+def test_segment_of_a_running_game_is_not_taken_over(tmp_path):
+    name = f"pxfg_test_{tmp_path.name}"
+    with SharedGridWriter((4, 6), 2, name=name):
+        with pytest.raises(FileExistsError, match="--shared_memory"):
+            SharedGridWriter((5, 7), 3, name=name)
+        with SharedGridReader(name) as reader:
+            assert reader.shape == (4, 6), "the running game's segment was replaced"
+
+
+def test_segment_of_a_crashed_game_is_replaced(tmp_path):
+    name = f"pxfg_test_{tmp_path.name}"
+    crashed = SharedGridWriter((4, 6), 2, name=name)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    PID_HEADER.pack_into(crashed.shm.buf, 64, dead.pid)
+    crashed._release() # Gone without unlinking, like a crash
+
+    with SharedGridWriter((5, 7), 3, name=name):
+        with SharedGridReader(name) as reader:
+            assert (reader.shape, reader.num_teams) == ((5, 7), 3)
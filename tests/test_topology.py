@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+from topology import TOPOLOGIES, get_topology
+
+
+@pytest.mark.parametrize("kind", TOPOLOGIES)
+@pytest.mark.parametrize("radius", [1, 2, 3])
+def test_scalar_lookups_match_tables(kind, radius, monkeypatch):
+    """random_neighbor() and neighbors() use plain arithmetic; they must agree with the vectorized tables."""
+    topology = get_topology(kind, (6, 8))
+    table = topology.neighbor_table(radius)
+    for y in range(topology.H):
+        for x in range(topology.W):
+            row = table[y * topology.W + x]
+            expected = [divmod(int(index), topology.W) for index in row if index >= 0]
+            assert topology.neighbors(y, x, radius) == expected
+            for k, index in enumerate(row):
+                monkeypatch.setattr(random, "random", lambda: (k + 0.5) / topology.K)
+                expected_pick = (y, x) if index < 0 else divmod(int(index), topology.W)
+                assert topology.random_neighbor(y, x, radius) == expected_pick
+
+
+def test_hex_needs_an_even_height():
+    with pytest.raises(ValueError, match="even"):
+        get_topology("hex", (7, 8))
+    assert get_topology("hex", (8, 7)).K == 7 # Odd widths wrap fine
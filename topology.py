@@ -0,0 +1,156 @@
+"""
+Grid topologies: which pixels count as neighbors, precomputed once per grid size.
+
+A topology turns "the pixel at offset (dy, dx) * radius from here" into a table
+lookup for the vectorized code. For every radius in use it builds one flat
+index table of shape (height * width, K): row i lists the K pixels around pixel
+i at that distance, the pixel itself included, with -1 for cells off the map.
+Tables are built on first use and shared by everything that asks for the same
+topology and grid size (the sync and batch engines, the fire field).
+
+Per-attack code (Class methods, run_simulation) picks one pixel at a time,
+where indexing a NumPy table costs more than the arithmetic it saves. It uses
+random_neighbor() and neighbors() instead: plain Python steps (dy, dx) per row
+parity, plus wrapping or the edge check, with the same results as the tables.
+
+    torus  square cells, edges wrap around (the original behavior), K = 9
+    walls  square cells, the map ends at its edges; attacks aimed off the map
+           hit the attacker's own pixel, clusters are cut off at the edge, K = 9
+    hex    hexagonal cells in "odd-r" offset layout (odd rows shifted half a
+           cell right), edges wrap around, K = 7. The height must be even
+           so rows alternate consistently across the wrap (ValueError otherwise).
+"""
+
+import random
+from functools import lru_cache
+
+import numpy as np
+
+TOPOLOGIES = ('torus', 'walls', 'hex')
+
+
+class Topology:
+    kind = None
+    directions = () # (dy, dx) unit offsets, the pixel itself included
+    edge_columns = () # Table columns of the pixels that share an edge with the pixel (4 on square grids)
+    wraps = True # Edges wrap around; otherwise cells off the map do not exist
+
+    def __init__(self, height, width):
+        self.H, self.W = height, width
+        self.shape = (height, width)
+        self.K = len(self.directions)
+        self.tables = {}
+        self.step_lists = {}
+
+    def neighbor_table(self, radius):
+        """(height * width, K) int32 table of flat neighbor indices at 'radius', -1 off the map. Read-only."""
+        table = self.tables.get(radius)
+        if table is None:
+            table = self.tables[radius] = self._build(radius).astype(np.int32)
+            table.flags.writeable = False
+        return table
+
+    def _build(self, radius):
+        raise NotImplementedError
+
+    # --- Scalar lookups for per-attack code (Class methods, run_simulation) ---
+    def steps(self, radius):
+        """(dy, dx) steps to the K pixels at 'radius', in table order: one list for even rows, one for odd rows."""
+        steps = self.step_lists.get(radius)
+        if steps is None:
+            steps = self.step_lists[radius] = self._steps(radius)
+        return steps
+
+    def _steps(self, radius):
+        steps = [(dy * radius, dx * radius) for dy, dx in self.directions]
+        return steps, steps
+
+    def random_neighbor(self, y, x, radius):
+        """A random pixel out of the K around (y, x) at 'radius', like pick_defender. Off the map means (y, x) itself."""
+        dy, dx = self.steps(radius)[y & 1][int(random.random() * self.K)]
+        ny, nx = y + dy, x + dx
+        if self.wraps:
+            return ny % self.H, nx % self.W
+        if 0 <= ny < self.H and 0 <= nx < self.W:
+            return ny, nx
+        return y, x
+
+    def neighbors(self, y, x, radius=1):
+        """Every (y, x) around (y, x) at 'radius' that is on the map, the pixel itself included."""
+        cells = [(y + dy, x + dx) for dy, dx in self.steps(radius)[y & 1]]
+        if self.wraps:
+            return [(ny % self.H, nx % self.W) for ny, nx in cells]
+        return [(ny, nx) for ny, nx in cells if 0 <= ny < self.H and 0 <= nx < self.W]
+
+
+class SquareTopology(Topology):
+    directions = tuple((dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+    edge_columns = (1, 3, 5, 7) # Up, left, right, down
+
+    def _build(self, radius):
+        ys, xs = np.divmod(np.arange(self.H * self.W), self.W)
+        table = np.empty((self.H * self.W, self.K), dtype=np.int64)
+        for k, (dy, dx) in enumerate(self.directions):
+            ny, nx = ys + dy * radius, xs + dx * radius
+            if self.wraps:
+                table[:, k] = (ny % self.H) * self.W + nx % self.W
+            else:
+                inside = (ny >= 0) & (ny < self.H) & (nx >= 0) & (nx < self.W)
+                table[:, k] = np.where(inside, ny * self.W + nx, -1)
+        return table
+
+class TorusTopology(SquareTopology):
+    kind = 'torus'
+
+class WallsTopology(SquareTopology):
+    kind = 'walls'
+    wraps = False
+
+class HexTopology(Topology):
+    kind = 'hex'
+    # Axial (dq, dr) steps: self, then the six neighboring hexagons
+    directions = ((0, 0), (1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+    edge_columns = (1, 2, 3, 4, 5, 6) # Every neighboring hexagon shares an edge
+
+    def __init__(self, height, width):
+        if height % 2:
+            # Wrapping from the last row to row 0 would join two rows shifted the same way
+            raise ValueError(f"The hex topology needs an even grid height, got {height}")
+        super().__init__(height, width)
+
+    def _build(self, radius):
+        ys, xs = np.divmod(np.arange(self.H * self.W), self.W)
+        q = xs - (ys - (ys & 1)) // 2 # odd-r offset -> axial
+        table = np.empty((self.H * self.W, self.K), dtype=np.int64)
+        for k, (dq, dr) in enumerate(self.directions):
+            ny = ys + dr * radius
+            nx = q + dq * radius + (ny - (ny & 1)) // 2 # axial -> odd-r offset
+            table[:, k] = (ny % self.H) * self.W + nx % self.W
+        return table
+
+    def _steps(self, radius):
+        # The column step of a hex direction only depends on whether the row is even or odd
+        steps = []
+        for parity in (0, 1):
+            row = []
+            for dq, dr in self.directions:
+                ny = parity + dr * radius
+                row.append((dr * radius, dq * radius + (ny - (ny & 1)) // 2))
+            steps.append(row)
+        return tuple(steps)
+
+
+@lru_cache(maxsize=None)
+def get_topology(kind, shape):
+    """The shared topology of this kind for a (height, width) grid."""
+    for cls in (TorusTopology, WallsTopology, HexTopology):
+        if cls.kind == kind:
+            return cls(*shape)
+    raise ValueError(f"Unknown topology '{kind}'. Choose from: {', '.join(TOPOLOGIES)}")
+
+def class_topology(team_classes, shape):
+    """The topology all teams play on. Raises ValueError if the teams disagree."""
+    kinds = {team_classes[i].topology for i in range(len(team_classes))}
+    if len(kinds) != 1:
+        raise ValueError(f"Teams play on different topologies: {', '.join(sorted(kinds))}")
+    return get_topology(kinds.pop(), tuple(shape))
@@ -0,0 +1,163 @@
+"""
+Monte Carlo estimate of every team's chance of winning from the current position.
+
+The current grid is copied once into a shared memory segment; each rollout
+attaches to it by name, copies it locally and plays the game to the end
+headless in a process pool. The first byte of the segment is a cancel flag
+that running rollouts check between frames, so a reset or the end of the game
+frees the workers within a frame instead of after a whole rollout. Only the small class state list (names and
+attributes such as Healer health) travels with each task.
+
+Rollouts play by the same rules as the game on screen: in sync mode every
+frame is one generation of the SyncEngine, and with fire turned on the current
+fire field (also in the shared segment) keeps burning and sparking. Expected
+frames left are therefore in the game's own frames.
+
+WinOddsEstimator is non-blocking so the game window can refresh it in the
+background: submit() starts a batch of rollouts, poll() picks up the result
+once they are done. estimate_win_odds() is the blocking one-shot version.
+"""
+
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from engine import get_class_states, restore_team_classes, continue_game
+from sync_engine import SyncEngine
+from fire import FireField
+
+HEADER_BYTES = 8 # Cancel flag, padded so the grid stays aligned
+
+
+def rollout(shm_name, shape, class_states, updates_per_frame, max_frames, seed, update_mode='async', priority='random', fire=0.0):
+    """Worker: plays one copy of the shared position to the end. Returns (winner, frames, finished)."""
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return None # Cancelled before this rollout started
+    cancelled = np.ndarray(1, dtype=np.uint8, buffer=shm.buf)
+    try:
+        grid = np.ndarray(shape, dtype=np.int32, buffer=shm.buf, offset=HEADER_BYTES).copy()
+        team_classes = restore_team_classes(class_states, level=logging.WARNING)
+        sync_engine = SyncEngine(shape, team_classes, priority, seed=seed) if update_mode == 'sync' else None
+        fire_field = None
+        if fire > 0:
+            fire_field = FireField(shape, spark_chance=fire, seed=seed, topology=team_classes[0].topology)
+            fire_field.fire[...] = np.ndarray(shape, dtype=np.int8, buffer=shm.buf, offset=HEADER_BYTES + grid.nbytes)
+        return continue_game(grid, team_classes, updates_per_frame, max_frames, sync_engine, fire_field, lambda: cancelled[0] != 0)
+    finally:
+        del cancelled # Views into the segment have to go before it can be closed
+        shm.close()
+
+
+class WinOddsEstimator:
+    def __init__(self, rollouts=32, workers=None, updates_per_frame=1000, max_frames=2000, update_mode='async', priority='random', fire=0.0):
+        """
+        rollouts: number of independent games played per estimate.
+        max_frames: frames after which a rollout is decided by pixel count.
+        update_mode, priority, fire: the game's --update_mode, --priority and --fire, so rollouts play the same game.
+        """
+        self.rollouts = rollouts
+        self.updates_per_frame = updates_per_frame
+        self.max_frames = max_frames
+        self.update_mode = update_mode
+        self.priority = priority
+        self.fire = fire
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        self.shm = None
+        self.futures = []
+        self.num_teams = 0
+        self.result = None # Latest (win_probabilities, expected_frames_left)
+        self.result_frame = 0 # Game frame the latest result was estimated from
+        self.submitted_frame = 0
+
+    @property
+    def busy(self):
+        return bool(self.futures)
+
+    def submit(self, grid, team_classes, frame_count=0, fire_field=None):
+        """
+        Starts a new estimate from this position (and the game's FireField, if fire is on).
+        Does nothing (returns False) while one is running.
+        """
+        if self.busy:
+            return False
+        self.submitted_frame = frame_count
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + grid.nbytes + (grid.size if self.fire > 0 else 0))
+        self.shm.buf[0] = 0
+        np.ndarray(grid.shape, dtype=np.int32, buffer=self.shm.buf, offset=HEADER_BYTES)[...] = grid
+        if self.fire > 0:
+            fire_state = np.ndarray(grid.shape, dtype=np.int8, buffer=self.shm.buf, offset=HEADER_BYTES + grid.nbytes)
+            fire_state[...] = fire_field.fire if fire_field is not None else 0
+        self.num_teams = len(team_classes)
+        class_states = get_class_states(team_classes)
+        base_seed = random.getrandbits(32)
+        self.futures = [
+            self.pool.submit(
+                rollout, self.shm.name, grid.shape, class_states,
+                self.updates_per_frame, self.max_frames, base_seed + i,
+                self.update_mode, self.priority, self.fire
+            )
+            for i in range(self.rollouts)
+        ]
+        return True
+
+    def poll(self):
+        """
+        Returns the latest finished estimate as (win_probabilities, expected_frames_left),
+        or None if there is none yet. Never waits for running rollouts.
+        """
+        if self.futures and all(future.done() for future in self.futures):
+            results = [future.result() for future in self.futures]
+            self._release()
+            wins = np.bincount([winner for winner, _, _ in results], minlength=self.num_teams)
+            self.result = (wins / len(results), float(np.mean([frames for _, frames, _ in results])))
+            self.result_frame = self.submitted_frame
+        return self.result
+
+    def cancel(self):
+        """
+        Forgets the running batch and the last result (e.g. after a reset).
+        Queued rollouts never start; running ones stop at their next frame.
+        """
+        for future in self.futures:
+            future.cancel()
+        if self.shm is not None:
+            self.shm.buf[0] = 1
+        self._release()
+        self.result = None
+        self.submitted_frame = 0
+
+    def close(self):
+        self.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self):
+        self.futures = []
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def estimate_win_odds(grid, team_classes, rollouts=32, workers=None, updates_per_frame=1000, max_frames=2000,
+                      update_mode='async', priority='random', fire_field=None):
+    """
+    Blocking helper: returns (win_probabilities, expected_frames_left) for the position.
+    win_probabilities[i] is the share of rollouts won by team i.
+    """
+    fire = fire_field.spark_chance if fire_field is not None else 0.0
+    estimator = WinOddsEstimator(rollouts, workers, updates_per_frame, max_frames, update_mode, priority, fire)
+    try:
+        estimator.submit(grid, team_classes, fire_field=fire_field)
+        for future in estimator.futures:
+            future.result()
+        return estimator.poll()
+    finally:
+        estimator.close()